@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+
+from aiohttp import web
+
+from app.api.sse import (
+    KEEPALIVE,
+    format_chunk,
+    format_end_event_id,
+    format_event,
+    format_event_id,
+    format_retry,
+    parse_last_event_id,
+)
+from app.config import Config
+from app.core.worker_pool import WorkerPoolFullError
+from app.services.index_service import index_service
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+routes = web.RouteTableDef()
+
+
+async def _call(namespace, method, *args, timeout=None):
+    """
+    Call an index server method without blocking the event loop
+
+    Args:
+        timeout: Seconds to wait for the result, defaults to
+            INDEX_SERVER_RPC_TIMEOUT
+
+    Raises:
+        TimeoutError: If the index server didn't answer in time
+    """
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        # Sending blocks while a replica connects, on the first call and the
+        # first one after a failover cooldown, so it happens off the loop
+        future = await loop.run_in_executor(
+            None, index_service.call_async, namespace, method, *args
+        )
+        return await asyncio.wrap_future(future)
+
+    return await asyncio.wait_for(call(), timeout or Config.INDEX_SERVER_RPC_TIMEOUT)
+
+
+@routes.get("/stream")
+async def stream(request):
+    """Stream query results over async I/O"""
+    query_text = request.query.get("text")
+    uuid_id = request.query.get("uuid")
+
+    if query_text is None:
+        return web.Response(
+            text="No text found, please include a ?text=blah parameter in the URL",
+            status=400,
+        )
+    if uuid_id is None:
+        return web.Response(
+            text="No UUID found, please include a ?uuid=blah parameter in the URL",
+            status=400,
+        )
+
+    # EventSource sends Last-Event-ID when reconnecting, polyfills use the query
+    last_event = parse_last_event_id(
+        request.headers.get("Last-Event-ID", request.query.get("lastEventId"))
+    )
+
+    if last_event is not None and last_event[1] is None:
+        # EventSource reconnects after every closed stream, 204 stops it
+        return web.Response(status=204)
+
+    try:
+        stream_id, offset, reset = None, 0, False
+        if last_event is not None:
+            stream_id, offset = last_event
+            # Resume from the server-side buffer if the stream hasn't expired
+            resumed = await _call(uuid_id, "read_stream", stream_id, offset)
+            if resumed is None:
+                logger.info(f"Stream {stream_id} expired, starting a new one")
+                stream_id, offset, reset = None, 0, True
+
+        if stream_id is None:
+            stream_id = await _call(uuid_id, "start_worker", query_text, uuid_id)
+    except WorkerPoolFullError as e:
+        logger.warning(f"Rejecting stream request: {str(e)}")
+        return web.Response(
+            text=f"Error: {str(e)}", status=503, headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error in stream: {str(e)}", exc_info=True)
+        return web.Response(text=f"Error: {str(e)}", status=500)
+
+    response = web.StreamResponse(
+        headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+    await response.prepare(request)
+    await response.write(format_retry(Config.SSE_RETRY_MS).encode("utf-8"))
+    if reset:
+        # Tell the client to drop the text of the expired stream
+        await response.write(format_event("", event="reset").encode("utf-8"))
+
+    position = offset
+    deadline = time.time() + Config.QUERY_WORKER_TIMEOUT
+    try:
+        while time.time() < deadline:
+            # Long-poll: the index server answers as soon as there are new
+            # chunks, or empty-handed after the keepalive interval
+            result = await _call(
+                uuid_id,
+                "read_stream",
+                stream_id,
+                position,
+                Config.SSE_KEEPALIVE_SECONDS,
+                timeout=Config.SSE_KEEPALIVE_SECONDS + Config.INDEX_SERVER_RPC_TIMEOUT,
+            )
+            if result is None:
+                logger.warning(f"Stream {stream_id} expired while reading")
+                break
+
+            # Each chunk is a batch of tokens coalesced by the index server
+            events = []
+            for chunk in result["chunks"]:
+                position += 1
+                events.append(format_chunk(chunk, format_event_id(stream_id, position)))
+            if result["done"]:
+                events.append(
+                    format_event(
+                        "", event_id=format_end_event_id(stream_id), event="end"
+                    )
+                )
+            if not events:
+                events.append(KEEPALIVE)
+            await response.write("".join(events).encode("utf-8"))
+            if result["done"]:
+                break
+        else:
+            logger.warning(f"Stream for {uuid_id} timed out")
+    except TimeoutError:
+        # The client reconnects with Last-Event-ID and resumes from the buffer
+        logger.warning(f"Index server didn't answer reading stream {stream_id}")
+    except (ConnectionResetError, asyncio.CancelledError):
+        # The buffered chunks stay on the index server for a resume
+        logger.info(f"Client disconnected from stream {stream_id}")
+        raise
+
+    await response.write_eof()
+    return response
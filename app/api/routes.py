@@ -1,9 +1,25 @@
 import logging
+import time
 
 from flask import Blueprint, Response, jsonify, make_response, request
 
+from app.api.sse import (
+    KEEPALIVE,
+    format_chunk,
+    format_end_event_id,
+    format_event,
+    format_event_id,
+    format_retry,
+    parse_last_event_id,
+)
+from app.config import Config
+from app.core.worker_pool import WorkerPoolFullError
 from app.services.document_service import DocumentService
 from app.services.index_service import index_service
+from app.services.job_service import job_service
+from app.storage.clients import client_registry
+from app.storage.document_catalog import DOCUMENT_FIELDS
+from app.storage.s3_storage import delete_file_by_path
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -22,6 +38,36 @@ def upload_file():
         # Check if we should use filename as document ID
         use_filename = request.form.get("filename_as_doc_id", None) is not None
 
+        # Process in the background and return a job ID right away
+        async_requested = request.form.get("async", request.args.get("async"))
+        if Config.ASYNC_UPLOADS or async_requested is not None:
+            (
+                filepath,
+                filename,
+                generated_uuid,
+                content_hash,
+            ) = DocumentService.save_uploaded_file(request.files["file"])
+
+            # Duplicates are answered right away, there is nothing to process
+            cached_result = DocumentService.find_processed_document(content_hash)
+            if cached_result is not None:
+                delete_file_by_path(filepath)
+                return make_response(jsonify(cached_result), 200)
+
+            job_id = job_service.submit(
+                DocumentService.process_saved_document,
+                filepath,
+                filename,
+                generated_uuid,
+                use_filename=use_filename,
+                index_service=index_service,
+                content_hash=content_hash,
+            )
+            return make_response(
+                jsonify({"jobId": job_id, "uuid": generated_uuid, "status": "queued"}),
+                202,
+            )
+
         # Process the document
         result = DocumentService.process_document(
             request.files["file"],
@@ -37,12 +83,46 @@ def upload_file():
         return f"Error: {str(e)}", 500
 
 
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Get status, per-stage progress and result of an upload job"""
+    try:
+        job = job_service.get(job_id)
+        if job is None:
+            return f"No job found with ID {job_id}", 404
+        return make_response(jsonify(job)), 200
+    except Exception as e:
+        logger.error(f"Error in get_job: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}", 500
+
+
 @api_bp.route("/getDocuments", methods=["GET"])
 def get_documents():
-    """Get list of all documents with original endpoint path"""
+    """Get a page of documents with original endpoint path"""
     try:
-        document_list = index_service.get_documents_list()
-        return make_response(jsonify(document_list)), 200
+        limit = int(request.args.get("limit", Config.DOCUMENTS_PAGE_SIZE))
+        limit = max(1, min(limit, Config.DOCUMENTS_MAX_PAGE_SIZE))
+    except ValueError:
+        return "limit must be an integer", 400
+
+    fields = None
+    if request.args.get("fields"):
+        fields = [field.strip() for field in request.args["fields"].split(",")]
+        unknown = [field for field in fields if field not in DOCUMENT_FIELDS]
+        if unknown:
+            return f"Unknown fields: {', '.join(unknown)}", 400
+
+    try:
+        page = index_service.get_documents_list(
+            limit, request.args.get("cursor"), fields
+        )
+        # The body stays a plain list, the next page is announced in a header
+        response = make_response(jsonify(page["documents"]), 200)
+        if page["nextCursor"]:
+            response.headers["X-Next-Cursor"] = page["nextCursor"]
+        return response
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
     except Exception as e:
         logger.error(f"Error in get_documents: {str(e)}", exc_info=True)
         return f"Error: {str(e)}", 500
@@ -67,7 +147,9 @@ def query_index():
         response = index_service.query_index(query_text, query_doc_id or uuid_id)
 
         response_json = {
-            "text": str(response),
+            "text": response["text"],
+            # Slides the answer is based on, slideIndex points into previewUrls
+            "slides": response["slides"],
         }
         return make_response(jsonify(response_json)), 200
 
@@ -88,20 +170,116 @@ def stream():
     if uuid_id is None:
         return "No UUID found, please include a ?uuid=blah parameter in the URL", 400
 
+    # EventSource sends Last-Event-ID when reconnecting, polyfills use the query
+    last_event = parse_last_event_id(
+        request.headers.get("Last-Event-ID", request.args.get("lastEventId"))
+    )
+
+    if last_event is not None and last_event[1] is None:
+        # EventSource reconnects after every closed stream, 204 stops it
+        return "", 204
+
     try:
-        # Initialize index and start worker
-        index_service.initialize_index(uuid_id)
-        queue = index_service.start_worker(query_text, uuid_id)
+        stream_id, offset, reset = None, 0, False
+        if last_event is not None:
+            stream_id, offset = last_event
+            # Resume from the server-side buffer if the stream hasn't expired
+            if index_service.read_stream(uuid_id, stream_id, offset) is None:
+                logger.info(f"Stream {stream_id} expired, starting a new one")
+                stream_id, offset, reset = None, 0, True
+
+        if stream_id is None:
+            # Initialize index and start worker
+            index_service.initialize_index(uuid_id)
+            stream_id = index_service.start_worker(query_text, uuid_id)
 
         def generate():
-            while True:
-                response = queue.get()
-                if response is None:  # If we get None, that means the stream is done
-                    break
-                yield str(response)
+            position = offset
+            yield format_retry(Config.SSE_RETRY_MS)
+            if reset:
+                # Tell the client to drop the text of the expired stream
+                yield format_event("", event="reset")
+
+            deadline = time.time() + Config.QUERY_WORKER_TIMEOUT
+            while time.time() < deadline:
+                result = index_service.read_stream(
+                    uuid_id, stream_id, position, Config.SSE_KEEPALIVE_SECONDS
+                )
+                if result is None:
+                    logger.warning(f"Stream {stream_id} expired while reading")
+                    return
+
+                # Each chunk is a batch of tokens coalesced by the index server
+                for chunk in result["chunks"]:
+                    position += 1
+                    yield format_chunk(chunk, format_event_id(stream_id, position))
+                if result["done"]:
+                    yield format_event(
+                        "", event_id=format_end_event_id(stream_id), event="end"
+                    )
+                    return
+                if not result["chunks"]:
+                    yield KEEPALIVE
+
+            logger.warning(f"Stream for {uuid_id} timed out")
 
-        return Response(generate(), mimetype="text/event-stream")
+        response = Response(generate(), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    except WorkerPoolFullError as e:
+        logger.warning(f"Rejecting stream request: {str(e)}")
+        response = make_response(f"Error: {str(e)}", 503)
+        response.headers["Retry-After"] = "1"
+        return response
 
     except Exception as e:
         logger.error(f"Error in stream: {str(e)}", exc_info=True)
         return f"Error: {str(e)}", 500
+
+
+@api_bp.route("/health", methods=["GET"])
+def health():
+    """Report the health of the storage clients, index servers and unoservers"""
+    clients = client_registry.health_check()
+    index_servers = index_service.health_check()
+    # One reachable replica is enough, the others are failed over
+    status = 200 if all(clients.values()) and any(index_servers.values()) else 503
+    body = {
+        "clients": clients,
+        "indexServers": index_servers,
+        "unoservers": client_registry.get("unoserver").backend_health(),
+    }
+    return make_response(jsonify(body)), status
+
+
+@api_bp.route("/metrics/workers", methods=["GET"])
+def worker_metrics():
+    """Report active/queued query workers of every index server"""
+    try:
+        return make_response(jsonify(index_service.get_worker_stats())), 200
+    except Exception as e:
+        logger.error(f"Error in worker_metrics: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}", 500
+
+
+@api_bp.route("/metrics/caches", methods=["GET"])
+def cache_metrics():
+    """Report the cache counters of every index server"""
+    try:
+        return make_response(jsonify(index_service.get_cache_stats())), 200
+    except Exception as e:
+        logger.error(f"Error in cache_metrics: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}", 500
+
+
+@api_bp.route("/metrics/conversions", methods=["GET"])
+def conversion_metrics():
+    """Report the conversion queue depth and the load of every unoserver"""
+    try:
+        stats = client_registry.get("unoserver").stats()
+        return make_response(jsonify(stats)), 200
+    except Exception as e:
+        logger.error(f"Error in conversion_metrics: {str(e)}", exc_info=True)
+        return f"Error: {str(e)}", 500
@@ -0,0 +1,71 @@
+import json
+
+# Comment line sent while no chunks are ready, keeps proxies from closing the stream
+KEEPALIVE = ": keepalive\n\n"
+
+
+def format_retry(milliseconds):
+    """Frame the reconnection delay advertised to EventSource clients"""
+    return f"retry: {milliseconds}\n\n"
+
+
+def format_event(data, event_id=None, event=None):
+    """
+    Frame a Server-Sent Event
+
+    Args:
+        data: Event payload, multi-line payloads become several data lines
+        event_id: Id the client echoes back in Last-Event-ID when reconnecting
+        event: Event type, None for the default "message"
+
+    Returns:
+        str: The framed event
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    for line in str(data).split("\n"):
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+def format_chunk(chunk, event_id):
+    """
+    Frame a chunk read from an index server stream
+
+    Text chunks become default "message" events, {"event", "data"} chunks
+    become named events with a JSON payload (e.g. the source "slides").
+    """
+    if isinstance(chunk, dict):
+        return format_event(json.dumps(chunk["data"]), event_id, event=chunk["event"])
+    return format_event(chunk, event_id)
+
+
+def format_event_id(stream_id, offset):
+    """Build the event id of the chunk ending at offset"""
+    return f"{stream_id}:{offset}"
+
+
+def format_end_event_id(stream_id):
+    """Build the event id of the end event, telling resumes the answer is complete"""
+    return f"{stream_id}:end"
+
+
+def parse_last_event_id(last_event_id):
+    """
+    Parse a Last-Event-ID value sent by a reconnecting client
+
+    Returns:
+        tuple: (stream id, offset), offset None if the client got the end event,
+            or None if the value is missing or malformed
+    """
+    if not last_event_id:
+        return None
+    stream_id, _, offset = last_event_id.rpartition(":")
+    if stream_id and offset == "end":
+        return stream_id, None
+    if not stream_id or not offset.isdigit():
+        return None
+    return stream_id, int(offset)
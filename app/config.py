@@ -6,6 +6,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _index_server_endpoints():
+    """
+    Return the "host:port" of every index server replica
+
+    INDEX_SERVER_ENDPOINTS lists them explicitly, otherwise they are the
+    INDEX_SERVER_REPLICAS consecutive ports from INDEX_SERVER_PORT on
+    INDEX_SERVER_HOST.
+    """
+    endpoints = os.getenv("INDEX_SERVER_ENDPOINTS", "")
+    if endpoints.strip():
+        return [
+            endpoint.strip() for endpoint in endpoints.split(",") if endpoint.strip()
+        ]
+
+    host = os.getenv("INDEX_SERVER_HOST", "127.0.0.1")
+    port = int(os.getenv("INDEX_SERVER_PORT", "5602"))
+    replicas = int(os.getenv("INDEX_SERVER_REPLICAS", "1"))
+    return [f"{host}:{port + i}" for i in range(replicas)]
+
+
 class Config:
     """Central configuration class for the application"""
 
@@ -15,14 +35,29 @@ class Config:
     AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
     S3_BUCKET = os.environ.get("S3_BUCKET", "slidespeak-files")
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "16"))
 
     # MongoDB configuration
     MONGO_DB_URL = os.environ.get("MONGO_DB_URL")
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "20"))
+    MONGO_DB_NAME = os.environ.get("MONGO_DB_NAME", "slidespeak")
+
+    # Redis configuration (shared job state between web workers)
+    REDIS_URL = os.environ.get("REDIS_URL")
+
+    # Background upload jobs
+    ASYNC_UPLOADS = os.environ.get("ASYNC_UPLOADS", "False").lower() == "true"
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+    JOB_TTL = int(os.environ.get("JOB_TTL", "86400"))
 
     # Pinecone configuration
     PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
     PINECONE_REGION = os.environ.get("PINECONE_REGION", "us-east-1")
     PINECONE_INDEX = os.environ.get("PINECONE_INDEX", "pptx-index")
+    PINECONE_UPSERT_BATCH_SIZE = int(
+        os.environ.get("PINECONE_UPSERT_BATCH_SIZE", "100")
+    )
+    PINECONE_UPSERT_WORKERS = int(os.environ.get("PINECONE_UPSERT_WORKERS", "4"))
 
     # OpenAI configuration
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
@@ -31,11 +66,52 @@ class Config:
     DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
     PORT = int(os.environ.get("PORT", 5601))
 
+    # Async streaming server (stream_server.py), clear of the index server
+    # replica ports counting up from INDEX_SERVER_PORT
+    STREAM_PORT = int(os.environ.get("STREAM_PORT", 5700))
+
+    # Server-Sent Events settings
+    SSE_KEEPALIVE_SECONDS = int(os.environ.get("SSE_KEEPALIVE_SECONDS", "15"))
+    SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", "3000"))
+
     # File storage
     UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", "documents")
+    UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    # Largest accepted upload in bytes, 0 for no limit
+    MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))
+
+    # Serve repeat uploads of identical files from earlier results
+    DEDUP_UPLOADS = os.environ.get("DEDUP_UPLOADS", "True").lower() == "true"
 
     # Unoserver
     UNOSERVER_URL = os.environ.get("UNOSERVER_URL", "http://unoserver:2004")
+    # Comma separated unoserver instances to spread conversions over
+    UNOSERVER_URLS = [
+        url.strip()
+        for url in (os.environ.get("UNOSERVER_URLS") or UNOSERVER_URL).split(",")
+        if url.strip()
+    ]
+    # Conversions sent to one instance at a time, the rest wait in a queue
+    UNOSERVER_CONCURRENCY = int(os.environ.get("UNOSERVER_CONCURRENCY", "1"))
+    UNOSERVER_QUEUE_TIMEOUT = int(os.environ.get("UNOSERVER_QUEUE_TIMEOUT", "300"))
+    # Seconds an unreachable instance is skipped
+    UNOSERVER_FAILOVER_COOLDOWN = int(
+        os.environ.get("UNOSERVER_FAILOVER_COOLDOWN", "30")
+    )
+    UNOSERVER_POOL_SIZE = int(os.environ.get("UNOSERVER_POOL_SIZE", "8"))
+    UNOSERVER_CONNECT_TIMEOUT = int(os.environ.get("UNOSERVER_CONNECT_TIMEOUT", "5"))
+    # Conversion timeout: base seconds plus seconds per MiB of the deck
+    UNOSERVER_TIMEOUT = int(os.environ.get("UNOSERVER_TIMEOUT", "60"))
+    UNOSERVER_TIMEOUT_PER_MB = int(os.environ.get("UNOSERVER_TIMEOUT_PER_MB", "10"))
+    # With REDIS_URL, seconds a conversion holds its shared slot at most
+    UNOSERVER_SLOT_TTL = int(os.environ.get("UNOSERVER_SLOT_TTL", "900"))
+
+    # Slide preview rendering
+    PREVIEW_DPI = int(os.environ.get("PREVIEW_DPI", "200"))
+    PREVIEW_MAX_WIDTH = int(os.environ.get("PREVIEW_MAX_WIDTH", "0"))
+    PREVIEW_JPEG_QUALITY = int(os.environ.get("PREVIEW_JPEG_QUALITY", "75"))
+    PREVIEW_CHUNK_SIZE = int(os.environ.get("PREVIEW_CHUNK_SIZE", "8"))
+    PREVIEW_RENDER_WORKERS = int(os.environ.get("PREVIEW_RENDER_WORKERS", "4"))
 
     # Index server settings
     INDEX_SERVER_HOST = os.getenv(
@@ -44,11 +120,68 @@ class Config:
     INDEX_SERVER_PORT = int(os.getenv("INDEX_SERVER_PORT", "5602"))
     INDEX_SERVER_MAX_RETRIES = int(os.getenv("INDEX_SERVER_MAX_RETRIES", "10"))
     INDEX_SERVER_RETRY_INTERVAL = int(os.getenv("INDEX_SERVER_RETRY_INTERVAL", "3"))
+    # Index server processes started by index_server.py, on consecutive ports
+    INDEX_SERVER_REPLICAS = int(os.getenv("INDEX_SERVER_REPLICAS", "1"))
+    # Index servers the web workers route to, by namespace
+    INDEX_SERVER_ENDPOINTS = _index_server_endpoints()
+    # Seconds an unreachable index server is skipped before being tried again
+    INDEX_SERVER_FAILOVER_COOLDOWN = int(
+        os.getenv("INDEX_SERVER_FAILOVER_COOLDOWN", "10")
+    )
+    # Persistent connections per web worker, calls are multiplexed over them
+    INDEX_SERVER_POOL_SIZE = int(os.getenv("INDEX_SERVER_POOL_SIZE", "4"))
+    # Seconds to wait for a connection, a call, and for indexing a deck
+    INDEX_SERVER_CONNECT_TIMEOUT = int(os.getenv("INDEX_SERVER_CONNECT_TIMEOUT", "5"))
+    INDEX_SERVER_RPC_TIMEOUT = int(os.getenv("INDEX_SERVER_RPC_TIMEOUT", "120"))
+    INDEX_SERVER_INDEX_TIMEOUT = int(os.getenv("INDEX_SERVER_INDEX_TIMEOUT", "600"))
+    # Calls the index server executes concurrently
+    INDEX_SERVER_RPC_WORKERS = int(os.getenv("INDEX_SERVER_RPC_WORKERS", "64"))
+    # Stream reads the index server waits on concurrently, in their own threads
+    INDEX_SERVER_STREAM_WORKERS = int(os.getenv("INDEX_SERVER_STREAM_WORKERS", "256"))
+
+    # Index cache settings (per-namespace indexes kept warm in the index server)
+    INDEX_CACHE_MAX_SIZE = int(os.getenv("INDEX_CACHE_MAX_SIZE", "128"))
+    INDEX_CACHE_TTL = int(os.getenv("INDEX_CACHE_TTL", "3600"))
+
+    # Embedding cache: "local" (SQLite file), "mongo" or "none"
+    EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "local")
+
+    # Answer cache for repeated questions; mode is "exact" or "similarity"
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_MAX_SIZE = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "1000"))
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    ANSWER_CACHE_MODE = os.getenv("ANSWER_CACHE_MODE", "exact").lower()
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+    # /getDocuments pagination
+    DOCUMENTS_PAGE_SIZE = int(os.getenv("DOCUMENTS_PAGE_SIZE", "50"))
+    DOCUMENTS_MAX_PAGE_SIZE = int(os.getenv("DOCUMENTS_MAX_PAGE_SIZE", "200"))
+
+    # Background threads generating deck summaries for /getDocuments
+    SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "2"))
+
+    # Slide chunks retrieved per answer by /query and /stream
+    QUERY_SIMILARITY_TOP_K = int(os.getenv("QUERY_SIMILARITY_TOP_K", "2"))
+    STREAM_SIMILARITY_TOP_K = int(os.getenv("STREAM_SIMILARITY_TOP_K", "1"))
+
+    # Query worker pool settings (streaming queries in the index server)
+    QUERY_WORKER_MAX_WORKERS = int(os.getenv("QUERY_WORKER_MAX_WORKERS", "16"))
+    QUERY_WORKER_MAX_QUEUE = int(os.getenv("QUERY_WORKER_MAX_QUEUE", "32"))
+    QUERY_WORKER_TIMEOUT = int(os.getenv("QUERY_WORKER_TIMEOUT", "120"))
+
+    # Streamed tokens are sent to the web workers in batches of this size/age
+    STREAM_BATCH_MAX_CHARS = int(os.getenv("STREAM_BATCH_MAX_CHARS", "64"))
+    STREAM_BATCH_MAX_DELAY_MS = int(os.getenv("STREAM_BATCH_MAX_DELAY_MS", "50"))
+    # Seconds produced chunks are kept so a reconnecting stream can resume
+    STREAM_BUFFER_TTL = int(os.getenv("STREAM_BUFFER_TTL", "300"))
 
     # Directory paths
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DOCUMENTS_DIR = os.path.join(BASE_DIR, UPLOAD_FOLDER)
     PREVIEW_DIR = os.path.join(BASE_DIR, "preview_images")
+    EMBEDDING_CACHE_PATH = os.getenv(
+        "EMBEDDING_CACHE_PATH", os.path.join(BASE_DIR, "embedding_cache.db")
+    )
 
     @classmethod
     def validate(cls):
@@ -75,6 +208,16 @@ class Config:
                 f"Missing required environment variables: {', '.join(missing)}"
             )
 
+        replica_ports = range(
+            cls.INDEX_SERVER_PORT, cls.INDEX_SERVER_PORT + cls.INDEX_SERVER_REPLICAS
+        )
+        for name in ("PORT", "STREAM_PORT"):
+            if getattr(cls, name) in replica_ports:
+                raise ValueError(
+                    f"{name}={getattr(cls, name)} overlaps the index server "
+                    f"replica ports {replica_ports.start}-{replica_ports.stop - 1}"
+                )
+
         # Create required directories
         os.makedirs(cls.DOCUMENTS_DIR, exist_ok=True)
         os.makedirs(cls.PREVIEW_DIR, exist_ok=True)
@@ -0,0 +1,178 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+def normalize_query(query_text):
+    """
+    Normalize a query so trivially different phrasings share a cache entry
+
+    Args:
+        query_text: Query as sent by the user
+
+    Returns:
+        str: Lowercased query with collapsed whitespace and no trailing punctuation
+    """
+    normalized = re.sub(r"\s+", " ", query_text.strip().lower())
+    return normalized.rstrip(" ?!.")
+
+
+def _cosine_similarity(a, b):
+    """Cosine similarity of two vectors"""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class AnswerCache:
+    """
+    TTL and size bounded cache of query answers per namespace
+
+    Entries are keyed by (namespace, normalized query, model settings). In
+    similarity mode a miss falls back to the most similar cached query of the
+    same namespace and settings, if its query embedding is close enough.
+    """
+
+    def __init__(self, max_size=1000, ttl=3600, similarity_threshold=None):
+        """
+        Args:
+            max_size: Maximum number of cached answers
+            ttl: Seconds an answer stays valid (0 disables expiry)
+            similarity_threshold: Minimum cosine similarity for a similarity
+                match, None to only serve exact matches
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        # Every entry in LRU order, and the keys of each namespace so that
+        # similarity lookups and invalidations only visit their own namespace
+        self._entries = OrderedDict()
+        self._namespaces = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def uses_similarity(self):
+        """Whether lookups need the query embedding"""
+        return self.similarity_threshold is not None
+
+    def _is_expired(self, created_at):
+        return bool(self.ttl) and time.time() - created_at > self.ttl
+
+    def _remove(self, key):
+        """Drop an entry, the lock must be held"""
+        del self._entries[key]
+        keys = self._namespaces[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._namespaces[key[0]]
+
+    def _most_similar(self, embedding, candidates):
+        """Return the key of the closest candidate above the threshold, or None"""
+        best_key, best_score = None, self.similarity_threshold
+        for key, other_embedding in candidates:
+            score = _cosine_similarity(embedding, other_embedding)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _get_exact(self, key):
+        """Return the unexpired entry of a key or None, the lock must be held"""
+        entry = self._entries.get(key)
+        if entry is not None and self._is_expired(entry[1]):
+            self._remove(key)
+            return None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def get_exact(self, namespace, query_text, settings):
+        """
+        Return the answer cached for this exact query, or None
+
+        Needs no embedding, so callers try it before embedding the query. A
+        miss isn't counted, the get that follows it counts it.
+        """
+        key = (namespace, normalize_query(query_text), settings)
+        with self._lock:
+            entry = self._get_exact(key)
+        return entry[0] if entry is not None else None
+
+    def get(self, namespace, query_text, settings, embedding=None):
+        """
+        Return a cached answer, or None on a miss
+
+        Args:
+            namespace: Namespace the query runs against
+            query_text: Query text
+            settings: Hashable description of the model settings
+            embedding: Query embedding, used in similarity mode
+        """
+        key = (namespace, normalize_query(query_text), settings)
+        with self._lock:
+            entry = self._get_exact(key)
+            if entry is not None:
+                return entry[0]
+
+            if not self.uses_similarity or embedding is None:
+                self.misses += 1
+                return None
+
+            candidates = []
+            for other_key in self._namespaces.get(namespace, ()):
+                _, created_at, other_embedding = self._entries[other_key]
+                if (
+                    other_key[2] == settings
+                    and other_embedding is not None
+                    and not self._is_expired(created_at)
+                ):
+                    candidates.append((other_key, other_embedding))
+
+        # Compare the embeddings without holding up other lookups
+        best_key = self._most_similar(embedding, candidates)
+
+        with self._lock:
+            # The match may have been evicted or invalidated in the meantime
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return entry[0]
+
+    def put(self, namespace, query_text, settings, answer, embedding=None):
+        """Store an answer, evicting the least recently used entries if full"""
+        key = (namespace, normalize_query(query_text), settings)
+        with self._lock:
+            self._entries[key] = (answer, time.time(), embedding)
+            self._entries.move_to_end(key)
+            self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, namespace):
+        """Drop every answer of a namespace, e.g. after its content changed"""
+        with self._lock:
+            for key in self._namespaces.pop(namespace, ()):
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self):
+        """Return cache counters"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,101 @@
+import logging
+from threading import Lock
+
+from llama_index.embeddings.base import BaseEmbedding
+
+from app.storage.embedding_cache import embedding_cache_key
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model that looks up text embeddings in a cache before OpenAI"""
+
+    def __init__(self, embed_model, cache):
+        """
+        Args:
+            embed_model: Embedding model used for texts missing from the cache
+            cache: Backend with get_many(keys) and put_many(items) methods
+        """
+        super().__init__(
+            embed_batch_size=embed_model._embed_batch_size,
+            tokenizer=embed_model._tokenizer,
+            callback_manager=embed_model.callback_manager,
+        )
+        self.embed_model = embed_model
+        self.cache = cache
+        engine = getattr(embed_model, "text_engine", None)
+        self.model_name = getattr(engine, "value", engine) or type(embed_model).__name__
+
+        self._stats_lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_query_embedding(self, query):
+        """Get query embedding, queries are not cached"""
+        return self.embed_model._get_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        """Get text embedding"""
+        return self._get_text_embeddings([text])[0]
+
+    def _lookup(self, texts):
+        """Return cache keys and the cached vectors found for texts"""
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        try:
+            cached = self.cache.get_many(set(keys))
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {str(e)}")
+            cached = {}
+        return keys, cached
+
+    def _store(self, keys, texts, cached, embeddings):
+        """Save new embeddings and combine them with cached ones in input order"""
+        missing_keys = list(dict.fromkeys(key for key in keys if key not in cached))
+        new_vectors = dict(zip(missing_keys, embeddings))
+        if new_vectors:
+            try:
+                self.cache.put_many(new_vectors)
+            except Exception as e:
+                logger.warning(f"Embedding cache update failed: {str(e)}")
+
+        with self._stats_lock:
+            self.hits += len(texts) - len(missing_keys)
+            self.misses += len(missing_keys)
+
+        vectors = dict(cached, **new_vectors)
+        return [vectors[key] for key in keys]
+
+    def _get_text_embeddings(self, texts):
+        """Get text embeddings, only embedding texts missing from the cache"""
+        keys, cached = self._lookup(texts)
+        missing_texts = list(
+            {key: text for key, text in zip(keys, texts) if key not in cached}.values()
+        )
+        embeddings = []
+        if missing_texts:
+            embeddings = self.embed_model._get_text_embeddings(missing_texts)
+        return self._store(keys, texts, cached, embeddings)
+
+    async def _aget_text_embeddings(self, texts):
+        """Asynchronously get text embeddings, skipping cached texts"""
+        keys, cached = self._lookup(texts)
+        missing_texts = list(
+            {key: text for key, text in zip(keys, texts) if key not in cached}.values()
+        )
+        embeddings = []
+        if missing_texts:
+            embeddings = await self.embed_model._aget_text_embeddings(missing_texts)
+        return self._store(keys, texts, cached, embeddings)
+
+    def stats(self):
+        """Return cache hit/miss counters"""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0,
+            }
@@ -0,0 +1,45 @@
+import bisect
+import hashlib
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys to nodes
+
+    Every node is placed on the ring several times (virtual nodes), so keys
+    spread evenly and adding or removing a node only moves the keys of that
+    node.
+    """
+
+    def __init__(self, nodes, vnodes=100):
+        """
+        Args:
+            nodes: Node names, e.g. "host:port"
+            vnodes: Points per node on the ring
+        """
+        self.nodes = list(dict.fromkeys(nodes))
+        self._ring = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    def get_nodes(self, key):
+        """
+        Return every node in preference order for a key
+
+        The first node owns the key, the following ones are its failover
+        order.
+        """
+        start = bisect.bisect(self._hashes, _hash(key or ""))
+        nodes = []
+        for i in range(len(self._ring)):
+            node = self._ring[(start + i) % len(self._ring)][1]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == len(self.nodes):
+                    break
+        return nodes
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import os
+import time
+
+from app.config import Config
+from app.core.rpc import RPCClient, RPCConnectionError
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+# Auth key management for the index server
+def get_auth_key():
+    """Get authentication key for the index server from environment variable"""
+    # First, try to get the key from environment variable
+    env_key = os.environ.get("INDEX_SERVER_AUTH_KEY")
+    if env_key:
+        # Convert string to bytes for the connection handshake
+        return hashlib.md5(env_key.encode()).digest()
+
+    # Fallback to a static key derived from host and port
+    logger.warning(
+        "INDEX_SERVER_AUTH_KEY not set in environment, using fallback authentication"
+    )
+    host = getattr(Config, "INDEX_SERVER_HOST", "127.0.0.1")
+    port = getattr(Config, "INDEX_SERVER_PORT", 5602)
+    static_seed = f"{host}:{port}:slidespeak-auth-key"
+    return hashlib.sha256(static_seed.encode()).digest()
+
+
+def create_index_client(address=None, max_retries=None):
+    """
+    Create and return an RPCClient connected to an index server
+
+    Args:
+        address: (host, port) of the index server, defaults to the configured one
+        max_retries: Connection attempts, defaults to INDEX_SERVER_MAX_RETRIES
+    """
+    if address is None:
+        host = (
+            Config.INDEX_SERVER_HOST
+            if hasattr(Config, "INDEX_SERVER_HOST")
+            else "127.0.0.1"
+        )
+        port = (
+            Config.INDEX_SERVER_PORT if hasattr(Config, "INDEX_SERVER_PORT") else 5602
+        )
+        address = (host, port)
+
+    # Try to connect multiple times
+    if max_retries is None:
+        max_retries = (
+            Config.INDEX_SERVER_MAX_RETRIES
+            if hasattr(Config, "INDEX_SERVER_MAX_RETRIES")
+            else 10
+        )
+    retry_interval = (
+        Config.INDEX_SERVER_RETRY_INTERVAL
+        if hasattr(Config, "INDEX_SERVER_RETRY_INTERVAL")
+        else 3
+    )
+
+    for attempt in range(max_retries):
+        try:
+            client = RPCClient(
+                address,
+                get_auth_key(),
+                pool_size=Config.INDEX_SERVER_POOL_SIZE,
+                timeout=Config.INDEX_SERVER_RPC_TIMEOUT,
+                connect_timeout=Config.INDEX_SERVER_CONNECT_TIMEOUT,
+            )
+            logger.info("Connected to index server successfully")
+            return client
+        except RPCConnectionError:
+            if attempt == max_retries - 1:
+                break
+            logger.warning(
+                f"Connecting to index server failed (attempt {attempt+1}/{max_retries}), "
+                f"waiting {retry_interval} seconds before retrying..."
+            )
+            time.sleep(retry_interval)
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to index server: {str(e)}")
+            if attempt < max_retries - 1:
+                time.sleep(retry_interval)
+                continue
+            else:
+                raise
+
+    raise RPCConnectionError(
+        f"Could not connect to index server {address[0]}:{address[1]} "
+        f"after {max_retries} attempts"
+    )
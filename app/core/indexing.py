@@ -1,25 +1,34 @@
 import hashlib
 import logging
-import os
+import re
 import time
-from multiprocessing.managers import BaseManager
-from queue import Queue
-from threading import Thread
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 import boto3
 from dotenv import load_dotenv
 from langchain.chat_models import ChatOpenAI
-from llama_index import ServiceContext, VectorStoreIndex, download_loader
+from llama_index import Document, Prompt, ServiceContext, VectorStoreIndex
 from llama_index.callbacks import CallbackManager, LlamaDebugHandler
+from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llm_predictor.chatgpt import LLMPredictor
-from llama_index.node_parser import SimpleNodeParser
 
 from app.config import Config
+from app.core.answer_cache import AnswerCache
+from app.core.embeddings import CachedEmbedding
+from app.core.index_client import get_auth_key
+from app.core.rpc import RPCServer
+from app.core.streaming import StreamRegistry, StreamStats, TokenBatcher
+from app.core.worker_pool import QueryWorkerPool
 from app.storage.vector_storage import (
-    get_document_store,
     get_pinecone_client,
     get_storage_context,
 )
+from app.storage.document_catalog import get_document_catalog
+from app.storage.embedding_cache import get_embedding_cache
+from app.utils.pptx_extractor import format_slide, iter_slides
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,24 +45,130 @@ load_dotenv()
 # Setup logging for boto
 boto3.set_stream_logger("botocore", level="DEBUG")
 
-
-# Auth key management for BaseManager
-def get_auth_key():
-    """Get authentication key for BaseManager from environment variable"""
-    # First, try to get the key from environment variable
-    env_key = os.environ.get("INDEX_SERVER_AUTH_KEY")
-    if env_key:
-        # Convert string to bytes for BaseManager
-        return hashlib.md5(env_key.encode()).digest()
-
-    # Fallback to a static key derived from host and port
-    logger.warning(
-        "INDEX_SERVER_AUTH_KEY not set in environment, using fallback authentication"
-    )
-    host = getattr(Config, "INDEX_SERVER_HOST", "127.0.0.1")
-    port = getattr(Config, "INDEX_SERVER_PORT", 5602)
-    static_seed = f"{host}:{port}:slidespeak-auth-key"
-    return hashlib.sha256(static_seed.encode()).digest()
+# LLM used to answer queries
+LLM_MODEL_NAME = "gpt-3.5-turbo"
+LLM_TEMPERATURE = 0
+
+# Prompt of the background deck summaries
+SUMMARY_PROMPT = Prompt("Summarize this document in 2-3 sentences: {text}")
+
+
+def get_source_slides(source_nodes):
+    """
+    List the slides an answer was retrieved from, best match first
+
+    Args:
+        source_nodes: NodeWithScore list of a query response
+
+    Returns:
+        list: One dict per slide with slideNumber, slideIndex (index into the
+            deck's previewUrls) and score; nodes without slide metadata (decks
+            indexed before per-slide ingestion) are skipped
+    """
+    slides = {}
+    for source in source_nodes:
+        node_info = source.node.node_info or {}
+        if "slide_number" not in node_info:
+            continue
+        slide_number = int(node_info["slide_number"])
+        score = source.score or 0
+        if slide_number not in slides or score > slides[slide_number]["score"]:
+            slides[slide_number] = {
+                "slideNumber": slide_number,
+                "slideIndex": int(node_info.get("slide_index", slide_number - 1)),
+                "score": score,
+            }
+    return sorted(slides.values(), key=lambda slide: slide["score"], reverse=True)
+
+
+# Methods of IndexManager served to the web workers
+INDEX_SERVER_METHODS = [
+    "ping",
+    "query_index",
+    "insert_into_index",
+    "get_documents_list",
+    "initialize_index",
+    "start_worker",
+    "read_stream",
+    "get_index_cache_stats",
+    "get_worker_stats",
+    "get_embedding_cache_stats",
+    "get_answer_cache_stats",
+]
+
+
+class IndexCache:
+    """Thread-safe LRU cache of ready indexes keyed by namespace"""
+
+    def __init__(self, max_size=128, ttl=3600):
+        """
+        Args:
+            max_size: Maximum number of namespaces kept in the cache
+            ttl: Seconds after which a cached index is rebuilt (0 disables expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, namespace):
+        """Return the cached index for a namespace, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(namespace)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            index, created_at = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                del self._entries[namespace]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(namespace)
+            self.hits += 1
+            return index
+
+    def peek(self, namespace):
+        """Return the cached index for a namespace without counting the lookup"""
+        with self._lock:
+            entry = self._entries.get(namespace)
+            if entry is None:
+                return None
+            index, created_at = entry
+            if self.ttl and time.time() - created_at > self.ttl:
+                return None
+            return index
+
+    def put(self, namespace, index):
+        """Store an index, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[namespace] = (index, time.time())
+            self._entries.move_to_end(namespace)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        """Drop the cached index for a namespace"""
+        with self._lock:
+            self._entries.pop(namespace, None)
+
+    def stats(self):
+        """Return cache counters"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
 
 
 class IndexManager:
@@ -69,235 +184,466 @@ class IndexManager:
         openai.api_key = Config.OPENAI_API_KEY
 
         # Initialize variables
-        self.index = None
-        self.stored_docs = {}
-        self.docstore = get_document_store()
+        self.catalog = get_document_catalog()
 
         # Setup debug handler
         llama_debug = LlamaDebugHandler(print_trace_on_end=True)
         self.callback_manager = CallbackManager([llama_debug])
 
-        # Load document reader
-        PptxReader = download_loader("PptxReader")
-        self.loader = PptxReader()
+        # Embeddings of already seen chunk texts are reused from the cache
+        self.embed_model = OpenAIEmbedding()
+        embedding_cache = get_embedding_cache()
+        if embedding_cache is not None:
+            self.embed_model = CachedEmbedding(self.embed_model, embedding_cache)
+
+        # The service context is namespace independent, so build it once
+        self.service_context = self._build_service_context()
+
+        # Ready indexes per namespace, so repeat queries skip all setup work
+        self.index_cache = IndexCache(
+            max_size=Config.INDEX_CACHE_MAX_SIZE, ttl=Config.INDEX_CACHE_TTL
+        )
+        self._build_locks = {}
+        self._build_locks_lock = Lock()
+
+        # Bounded pool for streaming query workers
+        self.worker_pool = QueryWorkerPool(
+            max_workers=Config.QUERY_WORKER_MAX_WORKERS,
+            max_queue=Config.QUERY_WORKER_MAX_QUEUE,
+            timeout=Config.QUERY_WORKER_TIMEOUT,
+        )
+        self.stream_stats = StreamStats()
+
+        # Produced chunks are kept for a while so dropped clients can resume
+        self.streams = StreamRegistry(ttl=Config.STREAM_BUFFER_TTL)
+
+        # Answers to repeated questions per namespace
+        self.answer_cache = None
+        if Config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                max_size=Config.ANSWER_CACHE_MAX_SIZE,
+                ttl=Config.ANSWER_CACHE_TTL,
+                similarity_threshold=(
+                    Config.ANSWER_CACHE_SIMILARITY
+                    if Config.ANSWER_CACHE_MODE == "similarity"
+                    else None
+                ),
+            )
+
+        # Deck summaries are generated off the ingestion path
+        self.summary_predictor = LLMPredictor(
+            llm=ChatOpenAI(temperature=LLM_TEMPERATURE, model_name=LLM_MODEL_NAME)
+        )
+        self.summary_executor = ThreadPoolExecutor(
+            max_workers=Config.SUMMARY_WORKERS, thread_name_prefix="summary"
+        )
 
-    def worker(self, queue, query_text, doc_id, initialize_index=None):
+    def _get_cached_answer(self, namespace, query_text, similarity_top_k):
+        """
+        Look up an answer in the answer cache
+
+        Returns:
+            tuple: (cached answer or None, cache key arguments for storing one
+                or None on a hit)
+        """
+        if self.answer_cache is None:
+            return None, None
+
+        settings = (LLM_MODEL_NAME, LLM_TEMPERATURE, similarity_top_k)
+        cache_args = (namespace, query_text, settings)
+        # Only embed the query when no exact match saves the round trip
+        answer = self.answer_cache.get_exact(*cache_args)
+        if answer is not None:
+            return answer, None
+
+        embedding = None
+        if self.answer_cache.uses_similarity:
+            try:
+                embedding = self.embed_model.get_query_embedding(query_text)
+            except Exception as e:
+                # Answer the query anyway, just without a similar match
+                logger.warning(f"Couldn't embed the query for the cache: {str(e)}")
+
+        answer = self.answer_cache.get(*cache_args, embedding=embedding)
+        return answer, (cache_args, embedding)
+
+    def _cache_answer(self, cache_key, answer):
+        """Store an answer under the key returned by _get_cached_answer"""
+        if self.answer_cache is None or cache_key is None:
+            return
+        cache_args, embedding = cache_key
+        self.answer_cache.put(*cache_args, answer, embedding=embedding)
+
+    def worker(self, buffer, query_text, doc_id, deadline=None):
         """Worker process to handle querying the index asynchronously"""
+        batcher = TokenBatcher(
+            buffer,
+            max_chars=Config.STREAM_BATCH_MAX_CHARS,
+            max_delay=Config.STREAM_BATCH_MAX_DELAY_MS / 1000,
+            stats=self.stream_stats,
+        )
         try:
-            # If initialize_index is provided, use it to initialize the index
-            if initialize_index:
-                initialize_index(doc_id)
+            # Give up on queries that waited in the pool past their deadline
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError("Query timed out while waiting for a worker")
+
+            # Replay cached answers as a token stream
+            similarity_top_k = Config.STREAM_SIMILARITY_TOP_K
+            answer, cache_key = self._get_cached_answer(
+                doc_id, query_text, similarity_top_k
+            )
+            if answer is not None:
+                logger.info(f"Answer cache hit for namespace: {doc_id}")
+                text, slides = answer
+                for token in re.findall(r"\S+\s*|\s+", text):
+                    batcher.put(token)
+                batcher.flush()
+                buffer.put({"event": "slides", "data": slides})
+                buffer.put(None)
+                return
+
+            # Resolve the index for this call only; never shared between requests
+            index = self.get_index(doc_id)
 
             # Use streaming query engine
-            streaming_response = self.index.as_query_engine(
-                streaming=True, similarity_top_k=1
+            streaming_response = index.as_query_engine(
+                streaming=True, similarity_top_k=similarity_top_k
             ).query(query_text)
 
-            # Process text chunks as they arrive
+            # Process text chunks as they arrive, sending them in small batches
+            tokens = []
             for text in streaming_response.response_gen:
-                print(text)
-                queue.put(text)  # Put the text into the queue
+                tokens.append(text)
+                batcher.put(text)
+                if deadline is not None and time.time() > deadline:
+                    raise TimeoutError("Query timed out while streaming")
+
+            # Finish with the slides the answer is based on, then signal completion
+            batcher.flush()
+            slides = get_source_slides(streaming_response.source_nodes)
+            buffer.put({"event": "slides", "data": slides})
+            buffer.put(None)
 
-            # Signal completion
-            queue.put(None)
+            # Only complete answers are cached
+            self._cache_answer(cache_key, ("".join(tokens), slides))
 
         except Exception as e:
             logger.error(f"Error in worker: {str(e)}", exc_info=True)
-            queue.put(f"Error: {str(e)}")
-            queue.put(None)  # Always signal completion
-
-    def initialize_index(self, namespace):
-        """Create a new index for the specified namespace"""
-        logger.info(f"Initializing index for namespace: {namespace}")
+            batcher.flush()
+            buffer.put(f"Error: {str(e)}")
+            buffer.put(None)  # Always signal completion
 
+    def _build_service_context(self):
+        """Create the shared service context used by every index"""
         llm_predictor = LLMPredictor(
-            llm=ChatOpenAI(temperature=0, model_name="gpt-3.5-turbo", streaming=True)
+            llm=ChatOpenAI(
+                temperature=LLM_TEMPERATURE, model_name=LLM_MODEL_NAME, streaming=True
+            )
         )
-        service_context = ServiceContext.from_defaults(
+        return ServiceContext.from_defaults(
             chunk_size_limit=512,
             llm_predictor=llm_predictor,
+            embed_model=self.embed_model,
             callback_manager=self.callback_manager,
         )
 
+    def _build_index(self, namespace):
+        """Build a new index for the specified namespace"""
         # Get storage context using the centralized function
         storage_context = get_storage_context(namespace)
 
-        self.index = VectorStoreIndex.from_documents(
-            [], storage_context=storage_context, service_context=service_context
+        return VectorStoreIndex.from_documents(
+            [], storage_context=storage_context, service_context=self.service_context
         )
-        logger.info("Index initialized successfully")
+
+    def _get_build_lock(self, namespace):
+        """Get the lock guarding index construction for a namespace"""
+        with self._build_locks_lock:
+            return self._build_locks.setdefault(namespace, Lock())
+
+    def get_index(self, namespace):
+        """
+        Get the index for a namespace, building and caching it on a miss
+
+        Args:
+            namespace: Namespace (document ID) of the index
+
+        Returns:
+            The VectorStoreIndex for the namespace
+        """
+        index = self.index_cache.get(namespace)
+        if index is not None:
+            return index
+
+        # Only one thread builds a given namespace; others wait and reuse it
+        with self._get_build_lock(namespace):
+            # Built by another thread while waiting, the miss is counted already
+            index = self.index_cache.peek(namespace)
+            if index is None:
+                logger.info(f"Initializing index for namespace: {namespace}")
+                index = self._build_index(namespace)
+                self.index_cache.put(namespace, index)
+                logger.info("Index initialized successfully")
+        return index
+
+    def initialize_index(self, namespace):
+        """Warm up the index for the specified namespace"""
+        self.get_index(namespace)
 
     def start_worker(self, query_text, name):
-        """Start a worker thread for processing queries"""
+        """
+        Schedule a query worker on the bounded pool
+
+        Returns:
+            str: Stream id to read the produced chunks with read_stream
+        """
         logger.info(f"Starting worker for namespace: {name} with query: {query_text}")
-        queue = Queue()
-        t = Thread(
-            target=self.worker, args=(queue, query_text, name, self.initialize_index)
-        )
-        t.start()
-        return queue
+        stream_id, buffer = self.streams.create()
+        # Raises WorkerPoolFullError when the pool and its wait queue are full
+        self.worker_pool.submit(self.worker, buffer, query_text, name)
+        return stream_id
+
+    def read_stream(self, stream_id, offset=0, timeout=0):
+        """
+        Read the chunks of a stream produced after offset
+
+        Args:
+            stream_id: Id returned by start_worker
+            offset: Number of chunks the reader already has
+            timeout: Seconds to wait for new chunks
+
+        Returns:
+            dict: "chunks" after offset and "done", or None if the stream
+                is unknown or has expired
+        """
+        buffer = self.streams.get(stream_id)
+        if buffer is None:
+            return None
+        chunks, done = buffer.read(offset, timeout=timeout)
+        return {"chunks": chunks, "done": done}
 
     def query_index(self, query_text, name):
-        """Query the index"""
+        """
+        Query the index
+
+        Returns:
+            dict: Answer "text" and the source "slides"
+        """
         logger.info(f"Querying index for namespace: {name} with query: {query_text}")
-        response = self.index.as_query_engine().query(query_text)
-        return response
+        similarity_top_k = Config.QUERY_SIMILARITY_TOP_K
+        answer, cache_key = self._get_cached_answer(name, query_text, similarity_top_k)
+        if answer is not None:
+            logger.info(f"Answer cache hit for namespace: {name}")
+            text, slides = answer
+            return {"text": text, "slides": slides}
+
+        index = self.get_index(name)
+        response = index.as_query_engine(similarity_top_k=similarity_top_k).query(
+            query_text
+        )
+        text = str(response)
+        slides = get_source_slides(response.source_nodes)
+        self._cache_answer(cache_key, (text, slides))
+        return {"text": text, "slides": slides}
 
     def insert_into_index(self, doc_file_path, doc_id=None):
         """Insert new document into index"""
         logger.info(f"Inserting document into index: {doc_file_path} with ID: {doc_id}")
-        self.initialize_index(doc_id)
-        document = self.loader.load_data(file=doc_file_path)[0]
-
-        # Create parser and parse document into nodes
-        parser = SimpleNodeParser()
-        nodes = parser.get_nodes_from_documents([document])
-        self.docstore.add_documents(nodes)
-
-        if doc_id is not None:
-            document.doc_id = doc_id
+        index = self.get_index(doc_id)
+        doc_id = doc_id or str(uuid.uuid4())
+
+        # One document per slide, all sharing the deck's ID so its nodes can be
+        # deleted together
+        start_time = time.time()
+        slides = [(slide, format_slide(slide)) for slide in iter_slides(doc_file_path)]
+        documents = [
+            (slide, Document(text=text, doc_id=doc_id))
+            for slide, text in slides
+            if text
+        ]
+        deck_text = "\n\n".join(document.text for _, document in documents)
+        extract_time = time.time() - start_time
+
+        # Parse once with the index's own parser, then embed and store those
+        # nodes. The slide number goes into node_info, which is kept in the
+        # vector store metadata but, unlike extra_info, is neither embedded nor
+        # sent to the LLM. insert_nodes skips the docstore when the vector store
+        # keeps the text (Pinecone does), so the nodes are written there once
+        start_time = time.time()
+        nodes = []
+        for slide, document in documents:
+            slide_nodes = self.service_context.node_parser.get_nodes_from_documents(
+                [document]
+            )
+            for node in slide_nodes:
+                node.node_info = {
+                    **(node.node_info or {}),
+                    "slide_number": slide["slide_number"],
+                    "slide_index": slide["slide_index"],
+                }
+            nodes.extend(slide_nodes)
+        index.insert_nodes(nodes)
+        index.docstore.add_documents(nodes, allow_update=True)
+        index.docstore.set_document_hash(
+            doc_id, hashlib.sha256(deck_text.encode("utf-8")).hexdigest()
+        )
+        logger.info(
+            f"Extracted {len(slides)} slides in {extract_time:.2f}s, indexed "
+            f"{len(nodes)} nodes of {doc_id} in {time.time() - start_time:.2f}s"
+        )
 
-        self.index.insert(document)
+        # Answers given before this ingest may be outdated
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate(doc_id)
 
         # Create a better document preview/summary
         try:
-            # Extract document title if available, or use filename as fallback
-            doc_title = getattr(document, "title", None) or doc_file_path.split("/")[-1]
-
-            # Generate a meaningful preview - either use LLM summarization for longer docs
-            # or take a smart excerpt for shorter ones
-            if document.text and len(document.text) > 500:
-                # Option 1: Use your existing LLM to generate a summary
-                llm_predictor = LLMPredictor(
-                    llm=ChatOpenAI(temperature=0, model_name="gpt-3.5-turbo")
-                )
-                summary = llm_predictor.predict(
-                    f"Summarize this document in 2-3 sentences: {document.text[:2000]}"
-                )
-                preview = summary[:200]  # Limit summary length
-            else:
-                # Option 2: For shorter documents, take a clean excerpt
-                preview = (
-                    document.text[:200]
-                    if document.text
-                    else "No text content available"
-                )
-                # Avoid cutting in the middle of words
-                if len(document.text) > 200 and not preview.endswith(" "):
-                    preview = preview.rsplit(" ", 1)[0] + "..."
+            # Use the title of the first titled slide, or the filename as fallback
+            doc_title = next(
+                (slide["title"] for slide, _ in slides if slide["title"]),
+                doc_file_path.split("/")[-1],
+            )
+
+            # Start with a clean excerpt, longer documents get an LLM summary
+            # generated in the background so the upload doesn't wait for it
+            preview = deck_text[:200] if deck_text else "No text content available"
+            # Avoid cutting in the middle of words
+            if len(deck_text) > 200 and not preview.endswith(" "):
+                preview = preview.rsplit(" ", 1)[0] + "..."
+
+            needs_summary = len(deck_text) > 500
 
             # Store more useful document metadata
-            self.stored_docs[document.doc_id] = {
-                "title": doc_title,
-                "preview": preview,
-                "length": len(document.text) if document.text else 0,
-                "filename": doc_file_path.split("/")[-1],
-            }
+            self.catalog.upsert(
+                doc_id,
+                {
+                    "title": doc_title,
+                    "preview": preview,
+                    "preview_status": "pending" if needs_summary else "excerpt",
+                    "length": len(deck_text),
+                    "filename": doc_file_path.split("/")[-1],
+                },
+            )
+
+            if needs_summary:
+                self.summary_executor.submit(
+                    self._summarize_document, doc_id, deck_text
+                )
         except Exception as e:
             logger.warning(f"Error creating document preview: {str(e)}")
             # Fallback to the original approach if something goes wrong
-            self.stored_docs[document.doc_id] = (
-                document.text[:200] if document.text else "No preview available"
+            self.catalog.upsert(
+                doc_id,
+                {
+                    "preview": deck_text[:200] if deck_text else "No preview available",
+                },
             )
 
         return
 
-    def get_documents_list(self):
-        """Get the list of currently stored documents"""
-        documents_list = []
-        for doc_id, doc_metadata in self.stored_docs.items():
-            documents_list.append(
-                {
-                    "id": doc_id,
-                    "title": doc_metadata.get("title", "Unknown"),
-                    "preview": doc_metadata.get("preview", "No preview available"),
-                    "length": doc_metadata.get("length", 0),
-                    "filename": doc_metadata.get("filename", "Unknown"),
-                }
+    def _summarize_document(self, doc_id, text):
+        """Replace the excerpt preview of a document with an LLM summary"""
+        try:
+            start_time = time.time()
+            # The deck text goes in as a prompt argument, braces in it stay text
+            summary, _ = self.summary_predictor.predict(
+                SUMMARY_PROMPT, text=text[:2000]
             )
-        return documents_list
-
-
-# Create a singleton instance
-index_manager = IndexManager()
-
-
-def create_index_manager():
-    """Create and return a BaseManager connected to the index server"""
+            self.catalog.update(
+                doc_id,
+                # Limit summary length
+                {"preview": summary[:200], "preview_status": "summary"},
+            )
+            logger.info(
+                f"Summary for {doc_id} generated in {time.time() - start_time:.2f}s"
+            )
+        except Exception as e:
+            # The excerpt stays in place as the preview
+            logger.warning(f"Error summarizing document {doc_id}: {str(e)}")
+            self.catalog.update(doc_id, {"preview_status": "excerpt"})
+
+    def get_documents_list(self, limit=None, cursor=None, fields=None):
+        """
+        Get a page of stored documents, newest first
+
+        Args:
+            limit: Maximum number of documents (default: Config.DOCUMENTS_PAGE_SIZE)
+            cursor: Cursor returned with the previous page
+            fields: Document fields to include (default: all)
+
+        Returns:
+            dict: "documents" of this page and "nextCursor" (None on the last page)
+        """
+        documents, next_cursor = self.catalog.list(
+            limit or Config.DOCUMENTS_PAGE_SIZE, cursor=cursor, fields=fields
+        )
+        return {"documents": documents, "nextCursor": next_cursor}
+
+    def get_index_cache_stats(self):
+        """Get hit/miss/eviction counters of the index cache"""
+        return self.index_cache.stats()
+
+    def get_answer_cache_stats(self):
+        """Get hit/miss counters of the answer cache"""
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return self.answer_cache.stats()
+
+    def get_embedding_cache_stats(self):
+        """Get hit/miss counters of the embedding cache"""
+        if isinstance(self.embed_model, CachedEmbedding):
+            return self.embed_model.stats()
+        return {"enabled": False}
+
+    def ping(self):
+        """Health check of the index server"""
+        return True
+
+    def get_worker_stats(self):
+        """Get active/queued counters of the query worker pool"""
+        stats = self.worker_pool.stats()
+        stats["stream"] = self.stream_stats.stats()
+        return stats
+
+
+def run_index_server(port=None):
+    """
+    Run the index server
+
+    Args:
+        port: Port to listen on, defaults to INDEX_SERVER_PORT (replicas pass
+            their own)
+    """
     host = (
         Config.INDEX_SERVER_HOST
         if hasattr(Config, "INDEX_SERVER_HOST")
         else "127.0.0.1"
     )
-    port = Config.INDEX_SERVER_PORT if hasattr(Config, "INDEX_SERVER_PORT") else 5602
-
-    # Create a BaseManager with secure configuration
-    manager = BaseManager((host, port), get_auth_key())
-    manager.register("query_index", index_manager.query_index)
-    manager.register("insert_into_index", index_manager.insert_into_index)
-    manager.register("get_documents_list", index_manager.get_documents_list)
-    manager.register("initialize_index", index_manager.initialize_index)
-    manager.register("start_worker", index_manager.start_worker)
-
-    # Try to connect multiple times
-    max_retries = (
-        Config.INDEX_SERVER_MAX_RETRIES
-        if hasattr(Config, "INDEX_SERVER_MAX_RETRIES")
-        else 10
-    )
-    retry_interval = (
-        Config.INDEX_SERVER_RETRY_INTERVAL
-        if hasattr(Config, "INDEX_SERVER_RETRY_INTERVAL")
-        else 3
-    )
-
-    for attempt in range(max_retries):
-        try:
-            manager.connect()
-            logger.info("Connected to index server successfully")
-            return manager
-        except ConnectionRefusedError:
-            logger.warning(
-                f"Connecting to index server failed (attempt {attempt+1}/{max_retries}), "
-                f"waiting {retry_interval} seconds before retrying..."
-            )
-            time.sleep(retry_interval)
-        except Exception as e:
-            logger.error(f"Unexpected error connecting to index server: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_interval)
-                continue
-            else:
-                raise
-
-    raise ConnectionError(
-        f"Could not connect to index server after {max_retries} attempts"
-    )
+    if port is None:
+        port = (
+            Config.INDEX_SERVER_PORT if hasattr(Config, "INDEX_SERVER_PORT") else 5602
+        )
+    logger.info(f"Starting index server on {host}:{port}...")
+    print(f"Starting index server on {host}:{port}...")
 
+    # Build the index manager only in the server process
+    index_manager = IndexManager()
 
-def run_index_server():
-    """Run the index server"""
-    logger.info(
-        f"Starting index server on {Config.INDEX_SERVER_HOST}:{Config.INDEX_SERVER_PORT}..."
-    )
-    print(
-        f"Starting index server on {Config.INDEX_SERVER_HOST}:{Config.INDEX_SERVER_PORT}..."
+    server = RPCServer(
+        (host, port), get_auth_key(), max_workers=Config.INDEX_SERVER_RPC_WORKERS
     )
-    host = (
-        Config.INDEX_SERVER_HOST
-        if hasattr(Config, "INDEX_SERVER_HOST")
-        else "127.0.0.1"
+    # Stream reads long-poll for up to SSE_KEEPALIVE_SECONDS, on their own pool
+    # so that open streams can't take every thread from queries and uploads
+    stream_executor = ThreadPoolExecutor(
+        max_workers=Config.INDEX_SERVER_STREAM_WORKERS,
+        thread_name_prefix="rpc-stream",
     )
-    port = Config.INDEX_SERVER_PORT if hasattr(Config, "INDEX_SERVER_PORT") else 5602
-
-    # Create a BaseManager with secure configuration
-    manager = BaseManager((host, port), get_auth_key())
-    manager.register("query_index", index_manager.query_index)
-    manager.register("insert_into_index", index_manager.insert_into_index)
-    manager.register("get_documents_list", index_manager.get_documents_list)
-    manager.register("initialize_index", index_manager.initialize_index)
-    manager.register("start_worker", index_manager.start_worker)
+    for method in INDEX_SERVER_METHODS:
+        server.register(
+            method,
+            getattr(index_manager, method),
+            executor=stream_executor if method == "read_stream" else None,
+        )
 
-    server = manager.get_server()
     logger.info("Index server started and ready to accept connections")
     server.serve_forever()
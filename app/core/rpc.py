@@ -0,0 +1,339 @@
+import itertools
+import logging
+import os
+import pickle
+import socket
+import threading
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class RPCError(Exception):
+    """Raised when a remote call fails for a reason other than the handler"""
+
+
+class RPCConnectionError(ConnectionError):
+    """
+    Raised when the server can't be reached or the connection is lost
+
+    Exceptions raised by the remote handlers, ConnectionError included, are
+    re-raised as they are, so this type alone tells the transport failed.
+    """
+
+
+def _dumps(message):
+    return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _connect(address, authkey, timeout):
+    """
+    Open an authenticated connection, giving up after timeout seconds
+
+    multiprocessing.connection.Client has no timeout, so a host that drops the
+    packets would block the caller for minutes. The TCP connect is bounded by
+    the socket timeout, the auth handshake by shutting the socket down.
+
+    Raises:
+        RPCConnectionError: If the server can't be reached or doesn't answer
+    """
+    try:
+        sock = socket.create_connection(address, timeout=timeout)
+    except OSError as e:
+        raise RPCConnectionError(
+            f"Can't connect to {address[0]}:{address[1]}: {str(e)}"
+        ) from e
+
+    with sock:
+        # Connection reads and writes the raw descriptor, which must block
+        sock.settimeout(None)
+        conn = Connection(os.dup(sock.fileno()))
+        timer = threading.Timer(timeout, sock.shutdown, (socket.SHUT_RDWR,))
+        timer.start()
+        try:
+            answer_challenge(conn, authkey)
+            deliver_challenge(conn, authkey)
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise RPCConnectionError(
+                f"RPC handshake with {address[0]}:{address[1]} failed: "
+                f"{str(e) or 'connection closed'}"
+            ) from e
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            timer.cancel()
+    return conn
+
+
+class RPCServer:
+    """
+    Serve registered functions to RPCClients
+
+    Connections are persistent. Each one has a reader thread that hands the
+    requests to a shared thread pool, so several calls of one connection run
+    concurrently and their responses are sent back as they finish, tagged
+    with the id of their request.
+    """
+
+    def __init__(self, address, authkey, max_workers=64):
+        """
+        Args:
+            address: (host, port) to listen on
+            authkey: Shared secret clients must prove they know (HMAC challenge)
+            max_workers: Number of calls executed concurrently
+        """
+        self.address = address
+        self.authkey = authkey
+        self.handlers = {}
+        self.executors = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rpc-call"
+        )
+
+    def register(self, name, func, executor=None):
+        """
+        Expose func to clients under name
+
+        Args:
+            name: Name clients call the function by
+            func: Function to call
+            executor: Pool to run the calls on instead of the shared one, so
+                calls that block for long can't starve the other methods
+        """
+        self.handlers[name] = func
+        if executor is not None:
+            self.executors[name] = executor
+
+    def serve_forever(self):
+        """Accept connections until the process is stopped"""
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"RPC server listening on {self.address[0]}:{self.address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except AuthenticationError:
+                    logger.warning("Rejected RPC connection with a wrong auth key")
+                    continue
+                except (EOFError, OSError) as e:
+                    # e.g. a TCP probe hanging up before the auth handshake
+                    logger.warning(f"Failed to accept RPC connection: {str(e)}")
+                    continue
+                threading.Thread(
+                    target=self._serve_connection, args=(conn,), daemon=True
+                ).start()
+
+    def _serve_connection(self, conn):
+        send_lock = threading.Lock()
+        try:
+            while True:
+                request_id, method, args, kwargs = pickle.loads(conn.recv_bytes())
+                self.executors.get(method, self.executor).submit(
+                    self._handle, conn, send_lock, request_id, method, args, kwargs
+                )
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _handle(self, conn, send_lock, request_id, method, args, kwargs):
+        try:
+            handler = self.handlers.get(method)
+            if handler is None:
+                raise RPCError(f"Unknown method: {method}")
+            response = _dumps((request_id, True, handler(*args, **kwargs)))
+        except Exception as e:
+            try:
+                response = _dumps((request_id, False, e))
+            except Exception:
+                # The exception itself can't be pickled, send its description
+                response = _dumps((request_id, False, RPCError(repr(e))))
+
+        try:
+            with send_lock:
+                conn.send_bytes(response)
+        except OSError:
+            logger.info(f"Client disconnected before the response to {method}")
+
+
+class _Connection:
+    """One persistent client connection with requests multiplexed over it"""
+
+    def __init__(self, address, authkey, connect_timeout):
+        self.conn = _connect(address, authkey, connect_timeout)
+        self.closed = False
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        threading.Thread(target=self._read_responses, daemon=True).start()
+
+    def submit(self, method, args, kwargs):
+        """Send a request and return a Future of its result"""
+        future = Future()
+        request_id = next(self._request_ids)
+        with self._pending_lock:
+            if self.closed:
+                raise RPCConnectionError("RPC connection is closed")
+            self._pending[request_id] = future
+        message = _dumps((request_id, method, args, kwargs))
+        try:
+            with self._send_lock:
+                self.conn.send_bytes(message)
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+            self.close()
+            raise RPCConnectionError(f"RPC connection lost: {str(e)}") from e
+        return future
+
+    def _read_responses(self):
+        try:
+            while True:
+                request_id, ok, result = pickle.loads(self.conn.recv_bytes())
+                with self._pending_lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None or future.cancelled():
+                    continue  # The caller has timed out
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.close()
+
+    def forget(self, future):
+        """Drop a pending request whose caller stopped waiting"""
+        with self._pending_lock:
+            for request_id, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+
+    def close(self):
+        """Close the connection, failing every pending request"""
+        with self._pending_lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending, self._pending = self._pending, {}
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(RPCConnectionError("RPC connection lost"))
+
+
+class RPCClient:
+    """
+    Client of an RPCServer with a small pool of persistent connections
+
+    Calls are spread over the pool round robin and many calls can be in flight
+    on one connection. Closed connections are replaced on the next call.
+    Remote functions can be called as methods, e.g. client.get_worker_stats().
+    """
+
+    def __init__(self, address, authkey, pool_size=4, timeout=120, connect_timeout=5):
+        """
+        Args:
+            address: (host, port) of the server
+            authkey: Shared secret of the server
+            pool_size: Number of connections to open
+            timeout: Default seconds to wait for a response
+            connect_timeout: Seconds to wait for a new connection
+
+        Raises:
+            RPCConnectionError: If the server isn't reachable
+        """
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        self._open()
+
+    def _open(self):
+        self._pid = os.getpid()
+        self._connections = [
+            _Connection(self.address, self.authkey, self.connect_timeout)
+            for _ in range(self.pool_size)
+        ]
+
+    def _connection(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the reader threads didn't survive the fork
+                self._open()
+            slot = next(self._next) % len(self._connections)
+            connection = self._connections[slot]
+            if connection.closed:
+                connection = _Connection(
+                    self.address, self.authkey, self.connect_timeout
+                )
+                self._connections[slot] = connection
+            return connection
+
+    def call_async(self, method, *args, **kwargs):
+        """
+        Call a remote function without waiting for it
+
+        Returns:
+            concurrent.futures.Future: Result of the call, usable from asyncio
+                with asyncio.wrap_future
+        """
+        return self._connection().submit(method, args, kwargs)
+
+    def call(self, method, args=(), kwargs=None, timeout=None):
+        """
+        Call a remote function and wait for its result
+
+        Args:
+            method: Registered name of the function
+            args: Positional arguments
+            kwargs: Keyword arguments
+            timeout: Seconds to wait, defaults to the client timeout
+
+        Raises:
+            TimeoutError: If no response arrived in time
+            RPCConnectionError: If the server can't be reached or the
+                connection was lost during the call
+
+        Exceptions raised by the remote function are re-raised unchanged.
+        """
+        connection = self._connection()
+        future = connection.submit(method, args, kwargs or {})
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except futures.TimeoutError:
+            connection.forget(future)
+            raise TimeoutError(f"RPC call {method} timed out")
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def remote(*args, **kwargs):
+            return self.call(method, args, kwargs)
+
+        return remote
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
@@ -0,0 +1,164 @@
+import time
+import uuid
+from threading import Condition, Lock
+
+
+class StreamStats:
+    """Thread-safe counters of streamed tokens and delivered batches"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.tokens = 0
+        self.batches = 0
+
+    def record(self, tokens):
+        """Record one delivered batch made of the given number of tokens"""
+        with self._lock:
+            self.tokens += tokens
+            self.batches += 1
+
+    def stats(self):
+        """Return the counters, including the average batch size"""
+        with self._lock:
+            return {
+                "tokens": self.tokens,
+                "batches": self.batches,
+                "tokens_per_batch": (
+                    round(self.tokens / self.batches, 2) if self.batches else 0
+                ),
+            }
+
+
+class TokenBatcher:
+    """
+    Coalesce streamed tokens into small batches before putting them on a queue
+
+    Every batch becomes one Server-Sent Event and one read by the web workers,
+    so tokens are joined until either max_chars is reached or max_delay seconds
+    have passed since the first token of the batch. The delay is checked
+    whenever a token arrives, so a batch is never held back longer than the
+    LLM's own gap between tokens.
+    """
+
+    def __init__(self, queue, max_chars=64, max_delay=0.05, stats=None):
+        """
+        Args:
+            queue: Queue receiving the joined batches
+            max_chars: Flush once the pending batch reaches this many characters
+            max_delay: Flush once the oldest pending token is this many seconds old
+            stats: Optional StreamStats to record delivered batches in
+        """
+        self.queue = queue
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.stats = stats
+        self._pending = []
+        self._pending_chars = 0
+        self._started_at = None
+
+    def put(self, token):
+        """Add a token, flushing the batch if it is full or old enough"""
+        if not self._pending:
+            self._started_at = time.monotonic()
+        self._pending.append(token)
+        self._pending_chars += len(token)
+
+        if (
+            self._pending_chars >= self.max_chars
+            or time.monotonic() - self._started_at >= self.max_delay
+        ):
+            self.flush()
+
+    def flush(self):
+        """Put all pending tokens on the queue as a single batch"""
+        if not self._pending:
+            return
+        self.queue.put("".join(self._pending))
+        if self.stats is not None:
+            self.stats.record(len(self._pending))
+        self._pending = []
+        self._pending_chars = 0
+        self._started_at = None
+
+
+class StreamBuffer:
+    """
+    Chunks produced for one streamed answer, readable from any offset
+
+    The worker writes with put() like it would on a queue (None marks the end),
+    while readers poll with read() and may start over from an earlier offset
+    after a dropped connection.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.updated_at = time.time()
+        self._condition = Condition()
+
+    def put(self, item):
+        """Append a chunk, or mark the stream as complete when item is None"""
+        with self._condition:
+            if item is None:
+                self.done = True
+            else:
+                self.chunks.append(item)
+            self.updated_at = time.time()
+            self._condition.notify_all()
+
+    def read(self, offset=0, timeout=0):
+        """
+        Return the chunks after offset, waiting up to timeout for new ones
+
+        Args:
+            offset: Number of chunks the reader already has
+            timeout: Seconds to wait if there is nothing new yet
+
+        Returns:
+            tuple: (list of new chunks, whether the stream is complete)
+        """
+        with self._condition:
+            if timeout:
+                self._condition.wait_for(
+                    lambda: len(self.chunks) > offset or self.done, timeout=timeout
+                )
+            return self.chunks[offset:], self.done
+
+
+class StreamRegistry:
+    """Short-lived StreamBuffers keyed by stream id"""
+
+    def __init__(self, ttl=300):
+        """
+        Args:
+            ttl: Seconds a stream is kept after its last chunk
+        """
+        self.ttl = ttl
+        self._streams = {}
+        self._lock = Lock()
+
+    def create(self):
+        """
+        Register a new stream
+
+        Returns:
+            tuple: (stream id, StreamBuffer)
+        """
+        stream_id = uuid.uuid4().hex
+        buffer = StreamBuffer()
+        with self._lock:
+            self._purge_expired()
+            self._streams[stream_id] = buffer
+        return stream_id, buffer
+
+    def get(self, stream_id):
+        """Return the buffer of a stream, or None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._streams.get(stream_id)
+
+    def _purge_expired(self):
+        expired_before = time.time() - self.ttl
+        for stream_id, buffer in list(self._streams.items()):
+            if buffer.updated_at < expired_before:
+                del self._streams[stream_id]
@@ -0,0 +1,87 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolFullError(Exception):
+    """Raised when the query worker pool cannot accept more work"""
+
+
+class QueryWorkerPool:
+    """Bounded thread pool with a limited wait queue for query workers"""
+
+    def __init__(self, max_workers=16, max_queue=32, timeout=120):
+        """
+        Args:
+            max_workers: Number of queries executed concurrently
+            max_queue: Number of queries allowed to wait for a free worker
+            timeout: Seconds a query may take, including time spent queued
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="query-worker"
+        )
+        self._slots = BoundedSemaphore(max_workers + max_queue)
+        self._lock = Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args):
+        """
+        Schedule fn(*args, deadline=...) on the pool
+
+        Args:
+            fn: Callable accepting a ``deadline`` keyword (epoch seconds)
+            *args: Positional arguments for fn
+
+        Returns:
+            Future of the scheduled call
+
+        Raises:
+            WorkerPoolFullError: If all workers are busy and the queue is full
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Query worker pool is full, rejecting request")
+            raise WorkerPoolFullError(
+                "Too many concurrent queries, please retry shortly"
+            )
+
+        deadline = time.time() + self.timeout
+        with self._lock:
+            self.queued += 1
+
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return fn(*args, deadline=deadline)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                self._slots.release()
+
+        return self._executor.submit(run)
+
+    def stats(self):
+        """Return active/queued worker counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
@@ -1,10 +1,16 @@
 from flask import Flask
 from flask_cors import CORS
 
+from app.config import Config
+from app.utils.uploads import UploadRequest
+
 
 def create_app():
     app = Flask(__name__)
     app.response_buffering = False
+    # Stream uploads to DOCUMENTS_DIR and answer 413 to oversized requests
+    app.request_class = UploadRequest
+    app.config["MAX_CONTENT_LENGTH"] = Config.MAX_UPLOAD_SIZE or None
     CORS(app)
 
     # Import and register blueprints
@@ -12,3 +18,14 @@ def create_app():
 
     app.register_blueprint(api_bp)
     return app
+
+
+def create_stream_app():
+    """Create the aiohttp app serving /stream with async I/O"""
+    from aiohttp import web
+
+    from app.api.async_routes import routes
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
@@ -1,14 +1,17 @@
+import hashlib
 import logging
 import os
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 from werkzeug.utils import secure_filename
 
 from app.config import Config
-from app.storage.s3_storage import upload_file_to_s3
-from app.utils.file_utils import ppt_preview
+from app.storage.document_cache import get_document_cache
+from app.storage.s3_storage import delete_file_by_path, upload_file_to_s3
+from app.utils.file_utils import iter_ppt_preview
+from app.utils.uploads import HashingUploadFile
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -16,6 +19,13 @@ logger = logging.getLogger(__name__)
 # Create a dedicated thread pool for document processing
 document_executor = ThreadPoolExecutor(max_workers=4)
 
+# Separate pool for the indexing and preview branches of process_document, so
+# they never wait on uploads queued behind them in document_executor
+pipeline_executor = ThreadPoolExecutor(max_workers=8)
+
+# Content hash -> results of already processed uploads
+document_cache = get_document_cache()
+
 
 class DocumentService:
     """Service for handling document operations"""
@@ -23,14 +33,14 @@ class DocumentService:
     @staticmethod
     def save_uploaded_file(uploaded_file, documents_dir=None):
         """
-        Save uploaded file to disk
+        Save uploaded file to disk, hashing its content while it is written
 
         Args:
             uploaded_file: File from request
             documents_dir: Directory to save file to (default: Config.DOCUMENTS_DIR)
 
         Returns:
-            tuple: (filepath, filename, generated_uuid)
+            tuple: (filepath, filename, generated_uuid, content_hash)
         """
         if documents_dir is None:
             documents_dir = Config.DOCUMENTS_DIR
@@ -45,88 +55,140 @@ class DocumentService:
         filepath = os.path.join(documents_dir, os.path.basename(filename))
 
         start_time = time.time()
-        uploaded_file.save(filepath)
+        if isinstance(uploaded_file.stream, HashingUploadFile):
+            # Already streamed to disk and hashed while the request was parsed
+            content_hash = uploaded_file.stream.claim(filepath)
+        else:
+            hasher = hashlib.sha256()
+            with open(filepath, "wb") as f:
+                while True:
+                    chunk = uploaded_file.stream.read(Config.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+            content_hash = hasher.hexdigest()
         logger.info(f"File saved to {filepath} in {time.time() - start_time:.2f}s")
 
-        return filepath, filename, generated_uuid
+        return filepath, filename, generated_uuid, content_hash
 
     @staticmethod
-    def generate_previews(filepath, preview_dir=None, doc_uuid=None):
+    def find_processed_document(content_hash):
         """
-        Generate preview images for document
+        Look up the results of an earlier upload with the same content
 
         Args:
-            filepath: Path to document file
-            preview_dir: Directory to save previews (default: Config.PREVIEW_DIR)
-            doc_uuid: UUID to use for preview filenames
+            content_hash: SHA-256 hex digest of the uploaded file
 
         Returns:
-            list: Paths to generated preview images
+            dict: Response data of the earlier upload, or None
         """
-        if preview_dir is None:
-            preview_dir = Config.PREVIEW_DIR
+        if not Config.DEDUP_UPLOADS:
+            return None
 
-        if doc_uuid is None:
-            doc_uuid = str(uuid.uuid4())
+        try:
+            record = document_cache.get(content_hash)
+        except Exception as e:
+            logger.warning(f"Document cache lookup failed: {str(e)}")
+            return None
 
-        # Create directory if it doesn't exist
-        if not os.path.exists(preview_dir):
-            os.makedirs(preview_dir)
+        if record is None:
+            return None
 
-        start_time = time.time()
-        preview_file_paths = ppt_preview(
-            filepath, os.path.join(preview_dir, doc_uuid + ".jpg")
-        )
-        logger.info(f"Preview generation completed in {time.time() - start_time:.2f}s")
+        logger.info(f"Duplicate upload of {record['uuid']} ({content_hash})")
+        return {
+            "uuid": record["uuid"],
+            "previewUrls": record["previewUrls"],
+            "cached": True,
+        }
 
-        return preview_file_paths
+    @staticmethod
+    def remember_processed_document(content_hash, result, filename=None):
+        """
+        Store the results of a processed upload for later duplicates
+
+        Args:
+            content_hash: SHA-256 hex digest of the uploaded file
+            result: Response data of the upload
+            filename: Name the file was saved under
+        """
+        if not Config.DEDUP_UPLOADS:
+            return
+
+        # Only complete results may be served to later duplicates
+        if None in result["previewUrls"]:
+            return
+
+        try:
+            document_cache.put(
+                content_hash,
+                {
+                    "uuid": result["uuid"],
+                    "previewUrls": result["previewUrls"],
+                    "filename": filename,
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Document cache update failed: {str(e)}")
 
     @staticmethod
-    def upload_previews_to_s3(preview_file_paths, bucket_name=None):
+    def generate_and_upload_previews(
+        filepath, preview_dir=None, doc_uuid=None, bucket_name=None
+    ):
         """
-        Upload preview images to S3
+        Generate preview images and upload each one as soon as it is rendered
 
         Args:
-            preview_file_paths: List of paths to preview images
+            filepath: Path to document file
+            preview_dir: Directory to save previews (default: Config.PREVIEW_DIR)
+            doc_uuid: UUID to use for preview filenames
             bucket_name: S3 bucket name (default: Config.S3_BUCKET)
 
         Returns:
-            list: URLs of uploaded previews in order
+            list: URLs of uploaded previews in slide order
         """
+        if preview_dir is None:
+            preview_dir = Config.PREVIEW_DIR
+
+        if doc_uuid is None:
+            doc_uuid = str(uuid.uuid4())
+
         if bucket_name is None:
             bucket_name = Config.S3_BUCKET
 
-        preview_urls_dict = {}
-
-        if not preview_file_paths:
-            return []
+        # Create directory if it doesn't exist
+        if not os.path.exists(preview_dir):
+            os.makedirs(preview_dir)
 
-        # Make a list of all futures for the uploads
-        future_to_preview = {
-            document_executor.submit(
-                upload_file_to_s3,
+        def upload(preview_file_path):
+            preview_url = upload_file_to_s3(
                 preview_file_path,
                 bucket_name,
                 "preview-images/" + os.path.basename(preview_file_path),
-            ): preview_file_path
-            for preview_file_path in preview_file_paths
-        }
+            )
+            # Delete local file after successful upload
+            if os.path.exists(preview_file_path):
+                os.remove(preview_file_path)
+            return preview_url
 
+        # Hand every slide to the upload pool while the next ones still render
         start_time = time.time()
-        for future in as_completed(future_to_preview):
-            preview_file_path = future_to_preview[future]
-            try:
-                preview_url = future.result()
-                index = preview_file_paths.index(preview_file_path)
-                preview_urls_dict[index] = preview_url
+        future_to_index = {}
+        for index, preview_file_path in iter_ppt_preview(
+            filepath, os.path.join(preview_dir, doc_uuid + ".jpg")
+        ):
+            future_to_index[document_executor.submit(upload, preview_file_path)] = index
+        logger.info(f"Preview generation completed in {time.time() - start_time:.2f}s")
 
-                # Delete local file after successful upload
-                if os.path.exists(preview_file_path):
-                    os.remove(preview_file_path)
+        preview_urls_dict = {}
+        for future in as_completed(future_to_index):
+            index = future_to_index[future]
+            try:
+                preview_urls_dict[index] = future.result()
             except Exception as exc:
-                logger.error(f"{preview_file_path} generated an exception: {exc}")
+                logger.error(f"Preview {index} generated an exception: {exc}")
 
-        logger.info(f"S3 upload completed in {time.time() - start_time:.2f}s")
+        logger.info(f"Preview upload completed in {time.time() - start_time:.2f}s")
 
         # Convert dict to list in correct order
         return [preview_urls_dict[i] for i in sorted(preview_urls_dict.keys())]
@@ -144,44 +206,150 @@ class DocumentService:
         Returns:
             dict: Response data with UUID and preview URLs
         """
-        filepath = None
-        try:
-            # Save uploaded file
-            filepath, filename, generated_uuid = DocumentService.save_uploaded_file(
-                file
+        # Save uploaded file
+        (
+            filepath,
+            filename,
+            generated_uuid,
+            content_hash,
+        ) = DocumentService.save_uploaded_file(file)
+
+        # Serve repeat uploads of the same deck from the earlier results
+        cached_result = DocumentService.find_processed_document(content_hash)
+        if cached_result is not None:
+            delete_file_by_path(filepath)
+            return cached_result
+
+        return DocumentService.process_saved_document(
+            filepath,
+            filename,
+            generated_uuid,
+            use_filename=use_filename,
+            index_service=index_service,
+            content_hash=content_hash,
+        )
+
+    @staticmethod
+    def process_saved_document(
+        filepath,
+        filename,
+        generated_uuid,
+        use_filename=False,
+        index_service=None,
+        progress=None,
+        content_hash=None,
+    ):
+        """
+        Index, upload and generate previews for a document saved to disk
+
+        Args:
+            filepath: Path to the saved document
+            filename: Name of the saved document
+            generated_uuid: UUID generated for the document
+            use_filename: Whether to use filename as document ID
+            index_service: Service for indexing documents
+            progress: Optional callback called as progress(stage, status, **info)
+            content_hash: Content hash to remember the results under
+
+        Returns:
+            dict: Response data with UUID and preview URLs
+        """
+        if progress is None:
+
+            def progress(stage, status, **info):
+                pass
+
+        timings = {}
+        pipeline_start = time.time()
+
+        def run_stage(stage, func, *args, **kwargs):
+            progress(stage, "running")
+            start_time = time.time()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                progress(stage, "failed", error=str(e))
+                raise
+            timings[stage] = round(time.time() - start_time, 3)
+            progress(stage, "completed", duration=timings[stage])
+            return result
+
+        def index_branch():
+            doc_id = filename if use_filename else generated_uuid
+            run_stage(
+                "index", index_service.index_document, filepath, doc_id, use_filename
             )
 
-            # Index the document
-            if index_service:
-                doc_id = filename if use_filename else generated_uuid
-                index_service.index_document(filepath, doc_id, use_filename)
+        def preview_branch():
+            return run_stage(
+                "previews",
+                DocumentService.generate_and_upload_previews,
+                filepath,
+                doc_uuid=generated_uuid,
+            )
 
+        s3_future = None
+        branches = []
+        try:
             # Upload original file to S3
-            start_time = time.time()
             s3_future = document_executor.submit(
+                run_stage,
+                "upload_original",
                 upload_file_to_s3,
                 filepath,
                 Config.S3_BUCKET,
                 generated_uuid + os.path.splitext(filepath)[1],
             )
-            logger.info(f"S3 upload started, will take {time.time() - start_time:.2f}s")
-
-            # Generate and upload previews
-            preview_file_paths = DocumentService.generate_previews(
-                filepath, doc_uuid=generated_uuid
-            )
-            preview_urls = DocumentService.upload_previews_to_s3(preview_file_paths)
-
-            # Clean up original file after S3 upload completes
-            s3_future.add_done_callback(
-                lambda _: os.remove(filepath) if os.path.exists(filepath) else None
-            )
 
-            return {"uuid": generated_uuid, "previewUrls": preview_urls}
+            # Indexing and previews only share the read-only file, run them together
+            preview_future = pipeline_executor.submit(preview_branch)
+            branches.append(preview_future)
+            if index_service:
+                branches.append(pipeline_executor.submit(index_branch))
+
+            # Wait for every branch before looking at results, the file stays
+            # on disk until none of them needs it anymore
+            wait(branches)
+            for future in branches:
+                future.result()
+            preview_urls = preview_future.result()
+
+            timings["total"] = round(time.time() - pipeline_start, 3)
+            logger.info(f"Document {generated_uuid} processed, timings: {timings}")
+
+            result = {
+                "uuid": generated_uuid,
+                "previewUrls": preview_urls,
+                "timings": dict(timings),
+            }
+            if content_hash is not None:
+                # Only a complete upload may answer later duplicates, the
+                # original is what their document points at
+                try:
+                    original_url = s3_future.result()
+                except Exception:
+                    original_url = None
+                if original_url is None:
+                    logger.warning(
+                        f"Original of {generated_uuid} wasn't uploaded, "
+                        "not remembering it for deduplication"
+                    )
+                else:
+                    DocumentService.remember_processed_document(
+                        content_hash, result, filename=filename
+                    )
+            return result
 
         except Exception as e:
             logger.error(f"Error processing document: {str(e)}", exc_info=True)
-            # Clean up temp file if it exists
-            if filepath and os.path.exists(filepath):
-                os.remove(filepath)
             raise
+
+        finally:
+            # Clean up original file once the branches and S3 upload are done
+            wait(branches)
+            if s3_future is not None:
+                s3_future.add_done_callback(
+                    lambda _: os.remove(filepath) if os.path.exists(filepath) else None
+                )
+            elif filepath and os.path.exists(filepath):
+                os.remove(filepath)
@@ -1,37 +1,141 @@
 import logging
 import time
+from threading import Lock
 
-from app.core.indexing import create_index_manager
-from app.utils.retry import retry_with_backoff
+from app.config import Config
+from app.core.hash_ring import HashRing
+from app.core.index_client import create_index_client
+from app.core.rpc import RPCConnectionError
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Errors meaning an index server can't be reached, as opposed to a failed call.
+# Exceptions of the remote handlers arrive as they are, OSErrors included
+CONNECTION_ERRORS = (RPCConnectionError,)
 
-class IndexService:
-    """Service for handling index operations"""
-
-    def __init__(self):
-        self._manager = None
-        self._connect_to_index_manager()
-
-    @retry_with_backoff(max_retries=5, initial_delay=2)
-    def _connect_to_index_manager(self):
-        """Establish connection to index manager with retry"""
-        try:
-            logger.info("Connecting to index manager...")
-            self._manager = create_index_manager()
-            logger.info("Successfully connected to index manager")
-        except Exception as e:
-            logger.error(f"Failed to connect to index manager: {str(e)}")
-            raise
+# Caches of every index server, each reported by an IndexManager method
+CACHE_STATS_METHODS = {
+    "index": "get_index_cache_stats",
+    "answers": "get_answer_cache_stats",
+    "embeddings": "get_embedding_cache_stats",
+}
+
+
+class IndexServerEndpoint:
+    """Connection and health state of one index server replica"""
+
+    def __init__(self, name, cooldown=10):
+        """
+        Args:
+            name: "host:port" of the replica
+            cooldown: Seconds the replica is skipped after a connection error
+        """
+        host, _, port = name.rpartition(":")
+        self.name = name
+        self.address = (host, int(port))
+        self.cooldown = cooldown
+        self.down_until = 0
+        self.failures = 0
+        self._client = None
+        self._lock = Lock()
 
     @property
-    def manager(self):
-        """Get the index manager, reconnecting if necessary"""
-        if self._manager is None:
-            self._connect_to_index_manager()
-        return self._manager
+    def available(self):
+        """Whether the replica isn't cooling down after a connection error"""
+        return time.time() >= self.down_until
+
+    @property
+    def client(self):
+        """Get the RPC client, connecting on first use"""
+        with self._lock:
+            if self._client is None:
+                # Fail fast, the caller fails over to the next replica
+                self._client = create_index_client(self.address, max_retries=1)
+            return self._client
+
+    def mark_up(self):
+        self.down_until = 0
+        self.failures = 0
+
+    def mark_down(self):
+        self.down_until = time.time() + self.cooldown
+        self.failures += 1
+
+
+class IndexService:
+    """
+    Service for handling index operations
+
+    Calls are routed to the index server replicas with a consistent hash of
+    the namespace (document ID), so each namespace keeps hitting the replica
+    whose index and answer caches are warm. When that replica can't be reached
+    the call fails over to the next replica on the ring.
+    """
+
+    def __init__(self, endpoints=None):
+        """
+        Args:
+            endpoints: "host:port" of the replicas, defaults to
+                INDEX_SERVER_ENDPOINTS
+        """
+        endpoints = endpoints or Config.INDEX_SERVER_ENDPOINTS
+        self.endpoints = {
+            name: IndexServerEndpoint(name, Config.INDEX_SERVER_FAILOVER_COOLDOWN)
+            for name in endpoints
+        }
+        self.ring = HashRing(self.endpoints)
+
+    def _route(self, namespace):
+        """Return the endpoints for a namespace, available ones first"""
+        endpoints = [self.endpoints[name] for name in self.ring.get_nodes(namespace)]
+        # Replicas cooling down are still tried last, in case all of them are
+        return [e for e in endpoints if e.available] + [
+            e for e in endpoints if not e.available
+        ]
+
+    def _call(self, namespace, method, *args, timeout=None):
+        """
+        Call an index server method on the replica owning a namespace
+
+        Exceptions raised by the index server are re-raised unchanged and
+        never failed over, the call may already have had its effect.
+
+        Raises:
+            ConnectionError: If no replica can be reached
+            TimeoutError: If the replica didn't answer in time
+        """
+        last_error = None
+        for endpoint in self._route(namespace):
+            try:
+                result = endpoint.client.call(method, args, timeout=timeout)
+                endpoint.mark_up()
+                return result
+            except CONNECTION_ERRORS as e:
+                endpoint.mark_down()
+                last_error = e
+                logger.warning(
+                    f"Index server {endpoint.name} unreachable for {method}, "
+                    f"failing over: {str(e)}"
+                )
+        raise ConnectionError(f"No index server reachable for {method}: {last_error}")
+
+    def call_async(self, namespace, method, *args):
+        """
+        Call an index server method without blocking
+
+        Returns:
+            concurrent.futures.Future: Result of the call, to be awaited with
+                asyncio.wrap_future from async code
+        """
+        last_error = None
+        for endpoint in self._route(namespace):
+            try:
+                return endpoint.client.call_async(method, *args)
+            except CONNECTION_ERRORS as e:
+                endpoint.mark_down()
+                last_error = e
+        raise ConnectionError(f"No index server reachable for {method}: {last_error}")
 
     def initialize_index(self, doc_id):
         """
@@ -40,13 +144,7 @@ class IndexService:
         Args:
             doc_id: Document ID
         """
-        try:
-            self.manager.initialize_index(doc_id)
-        except Exception as e:
-            logger.error(f"Error initializing index: {str(e)}")
-            # Attempt to reconnect and retry once
-            self._connect_to_index_manager()
-            self.manager.initialize_index(doc_id)
+        self._call(doc_id, "initialize_index", doc_id)
 
     def index_document(self, filepath, doc_id, use_filename=False):
         """
@@ -58,20 +156,15 @@ class IndexService:
             use_filename: Whether to use filename as document ID
         """
         start_time = time.time()
-        try:
-            if use_filename:
-                self.manager.insert_into_index(filepath, doc_id=doc_id)
-            else:
-                self.manager.insert_into_index(filepath, doc_id)
-            logger.info(f"Document indexed in {time.time() - start_time:.2f}s")
-        except Exception as e:
-            logger.error(f"Error indexing document: {str(e)}")
-            # Attempt to reconnect and retry once
-            self._connect_to_index_manager()
-            if use_filename:
-                self.manager.insert_into_index(filepath, doc_id=doc_id)
-            else:
-                self.manager.insert_into_index(filepath, doc_id)
+        # Indexing a large deck takes longer than the default call timeout
+        self._call(
+            doc_id,
+            "insert_into_index",
+            filepath,
+            doc_id,
+            timeout=Config.INDEX_SERVER_INDEX_TIMEOUT,
+        )
+        logger.info(f"Document indexed in {time.time() - start_time:.2f}s")
 
     def query_index(self, query_text, doc_id):
         """
@@ -82,15 +175,9 @@ class IndexService:
             doc_id: Document ID
 
         Returns:
-            Query response
+            dict: Answer "text" and the source "slides"
         """
-        try:
-            return self.manager.query_index(query_text, doc_id)._getvalue()
-        except Exception as e:
-            logger.error(f"Error querying index: {str(e)}")
-            # Attempt to reconnect and retry once
-            self._connect_to_index_manager()
-            return self.manager.query_index(query_text, doc_id)._getvalue()
+        return self._call(doc_id, "query_index", query_text, doc_id)
 
     def start_worker(self, query_text, doc_id):
         """
@@ -101,30 +188,94 @@ class IndexService:
             doc_id: Document ID
 
         Returns:
-            Queue for receiving streaming results
+            str: Stream id to read the results with read_stream
+
+        Raises:
+            WorkerPoolFullError: If the index server is at capacity
+        """
+        return self._call(doc_id, "start_worker", query_text, doc_id)
+
+    def read_stream(self, doc_id, stream_id, offset=0, timeout=0):
+        """
+        Read streamed results produced after offset
+
+        Args:
+            doc_id: Document ID the stream was started for
+            stream_id: Id returned by start_worker
+            offset: Number of chunks already received
+            timeout: Seconds to wait for new chunks
+
+        Returns:
+            dict: "chunks" and "done", or None if the stream has expired
+        """
+        return self._call(doc_id, "read_stream", stream_id, offset, timeout)
+
+    def get_documents_list(self, limit=None, cursor=None, fields=None):
+        """
+        Get a page of indexed documents
+
+        Args:
+            limit: Maximum number of documents
+            cursor: Cursor returned with the previous page
+            fields: Document fields to include
+
+        Returns:
+            dict: "documents" of this page and "nextCursor"
+        """
+        # The catalog is shared, so any replica can answer
+        return self._call(None, "get_documents_list", limit, cursor, fields)
+
+    def get_worker_stats(self):
+        """
+        Get query worker pool metrics from every index server
+
+        Returns:
+            dict: Active/queued worker counters per replica, None for
+                unreachable ones
         """
-        try:
-            return self.manager.start_worker(query_text, doc_id)
-        except Exception as e:
-            logger.error(f"Error starting worker: {str(e)}")
-            # Attempt to reconnect and retry once
-            self._connect_to_index_manager()
-            return self.manager.start_worker(query_text, doc_id)
+        return self._stats_per_replica(lambda client: client.get_worker_stats())
 
-    def get_documents_list(self):
+    def get_cache_stats(self):
         """
-        Get list of indexed documents
+        Get the cache counters of every index server
 
         Returns:
-            List of documents
-        """
-        try:
-            return self.manager.get_documents_list()._getvalue()
-        except Exception as e:
-            logger.error(f"Error getting documents list: {str(e)}")
-            # Attempt to reconnect and retry once
-            self._connect_to_index_manager()
-            return self.manager.get_documents_list()._getvalue()
+            dict: Counters of each cache per replica, None for unreachable ones
+        """
+        return self._stats_per_replica(
+            lambda client: {
+                cache: client.call(method)
+                for cache, method in CACHE_STATS_METHODS.items()
+            }
+        )
+
+    def _stats_per_replica(self, get_stats):
+        """Collect get_stats(client) of every replica, None for unreachable ones"""
+        stats = {}
+        for name, endpoint in self.endpoints.items():
+            try:
+                stats[name] = get_stats(endpoint.client)
+            except CONNECTION_ERRORS + (TimeoutError,):
+                endpoint.mark_down()
+                stats[name] = None
+        return stats
+
+    def health_check(self):
+        """
+        Ping every index server
+
+        Returns:
+            dict: Whether each replica answered
+        """
+        health = {}
+        for name, endpoint in self.endpoints.items():
+            try:
+                health[name] = endpoint.client.call("ping", timeout=5)
+                endpoint.mark_up()
+            except CONNECTION_ERRORS + (TimeoutError,):
+                endpoint.mark_down()
+                health[name] = False
+        return health
 
 
 # Create a singleton instance
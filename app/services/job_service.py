@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.storage.clients import client_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class InMemoryJobStore:
+    """Job store kept in process memory (single web worker or tests)"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        """Store a job record"""
+        with self._lock:
+            self._jobs[job["id"]] = json.loads(json.dumps(job))
+
+    def get(self, job_id):
+        """Return a job record, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+
+class RedisJobStore:
+    """Job store shared by all web workers through Redis"""
+
+    def __init__(self, ttl=86400):
+        """
+        Args:
+            ttl: Seconds a job record is kept after its last update
+        """
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(job_id):
+        return f"slidespeak:job:{job_id}"
+
+    def save(self, job):
+        """Store a job record"""
+        client_registry.get("redis").set(
+            self._key(job["id"]), json.dumps(job), ex=self.ttl
+        )
+
+    def get(self, job_id):
+        """Return a job record, or None if unknown"""
+        data = client_registry.get("redis").get(self._key(job_id))
+        return json.loads(data) if data is not None else None
+
+
+class JobService:
+    """Service running document processing jobs in the background"""
+
+    def __init__(self, store=None, max_workers=None):
+        if store is None:
+            store = (
+                RedisJobStore(ttl=Config.JOB_TTL)
+                if Config.REDIS_URL
+                else InMemoryJobStore()
+            )
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.JOB_WORKERS,
+            thread_name_prefix="job-runner",
+        )
+        # Serializes read-modify-write updates of job records in this process
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func in the background and track it as a job
+
+        Args:
+            func: Callable accepting a ``progress`` keyword argument, which it
+                can call as progress(stage, status, **info)
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            str: ID of the created job
+        """
+        job_id = str(uuid.uuid4())
+        self.store.save(
+            {
+                "id": job_id,
+                "status": "queued",
+                "stages": {},
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "updated_at": time.time(),
+            }
+        )
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get the state of a job
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            dict: Job record, or None if unknown
+        """
+        return self.store.get(job_id)
+
+    def _update(self, job_id, **fields):
+        """Merge fields into a job record"""
+        with self._lock:
+            job = self.store.get(job_id) or {"id": job_id, "stages": {}}
+            job.update(fields)
+            job["updated_at"] = time.time()
+            self.store.save(job)
+
+    def _update_stage(self, job_id, stage, status, **info):
+        """Record the status of a single processing stage"""
+        with self._lock:
+            job = self.store.get(job_id) or {"id": job_id, "stages": {}}
+            stage_info = job["stages"].get(stage, {})
+            stage_info.update(info, status=status, updated_at=time.time())
+            job["stages"][stage] = stage_info
+            job["updated_at"] = time.time()
+            self.store.save(job)
+
+    def _run(self, job_id, func, args, kwargs):
+        """Execute a job and store its result or error"""
+        self._update(job_id, status="running")
+
+        def progress(stage, status, **info):
+            self._update_stage(job_id, stage, status, **info)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            self._update(job_id, status="completed", result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status="failed", error=str(e))
+
+
+# Create a singleton instance
+job_service = JobService()
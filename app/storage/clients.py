@@ -0,0 +1,204 @@
+import atexit
+import logging
+import os
+import threading
+
+import boto3
+import redis
+from botocore.config import Config as BotoConfig
+from pinecone import Pinecone
+from pymongo import MongoClient
+
+from app.config import Config
+from app.utils.unoserver_client import (
+    RedisUnoserverPool,
+    UnoserverClient,
+    UnoserverPool,
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """Process-wide registry of lazily created, pooled storage clients"""
+
+    def __init__(self):
+        self._factories = {}
+        self._closers = {}
+        self._health_checks = {}
+        self._reset_unhealthy = {}
+        self._clients = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+
+    def register(
+        self, name, factory, close=None, health_check=None, reset_unhealthy=True
+    ):
+        """
+        Register a client factory
+
+        Args:
+            name: Name the client is looked up by
+            factory: Callable creating the client
+            close: Optional callable releasing the client's resources
+            health_check: Optional callable raising if the client is unhealthy
+            reset_unhealthy: Whether a client failing its health check is
+                replaced, False for clients keeping state that must survive
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._closers[name] = close
+            self._health_checks[name] = health_check
+            self._reset_unhealthy[name] = reset_unhealthy
+
+    def get(self, name):
+        """
+        Get a client, creating it on first use
+
+        Args:
+            name: Name of a registered client
+
+        Returns:
+            The shared client instance
+        """
+        with self._lock:
+            # Connection pools must not be shared with a forked parent process
+            if os.getpid() != self._pid:
+                self._clients = {}
+                self._pid = os.getpid()
+
+            client = self._clients.get(name)
+            if client is None:
+                if name not in self._factories:
+                    raise KeyError(f"No client registered with name: {name}")
+                logger.info(f"Creating shared {name} client")
+                client = self._factories[name]()
+                self._clients[name] = client
+            return client
+
+    def reset(self, name):
+        """Close a client so that the next get() creates a fresh one"""
+        with self._lock:
+            client = self._clients.pop(name, None)
+            close = self._closers.get(name)
+        if client is not None and close is not None:
+            try:
+                close(client)
+            except Exception as e:
+                logger.warning(f"Error closing {name} client: {str(e)}")
+
+    def health_check(self):
+        """
+        Check every client created so far, replacing unhealthy ones unless
+        they were registered with reset_unhealthy=False
+
+        Returns:
+            dict: Client name mapped to True if healthy
+        """
+        with self._lock:
+            clients = dict(self._clients)
+
+        results = {}
+        for name, client in clients.items():
+            check = self._health_checks.get(name)
+            try:
+                if check is not None:
+                    check(client)
+                results[name] = True
+            except Exception as e:
+                logger.warning(f"Health check failed for {name} client: {str(e)}")
+                results[name] = False
+                if self._reset_unhealthy.get(name, True):
+                    self.reset(name)
+        return results
+
+    def close_all(self):
+        """Close all created clients"""
+        with self._lock:
+            names = list(self._clients.keys())
+        for name in names:
+            self.reset(name)
+
+
+def _create_s3_client():
+    """Create an S3 client for either MinIO (local) or AWS S3"""
+    kwargs = {
+        "aws_access_key_id": Config.AWS_ACCESS_KEY_ID,
+        "aws_secret_access_key": Config.AWS_SECRET_ACCESS_KEY,
+        "config": BotoConfig(max_pool_connections=Config.S3_MAX_POOL_CONNECTIONS),
+    }
+    if Config.IS_LOCAL:
+        # Use MinIO for local development
+        kwargs["endpoint_url"] = Config.MINIO_ENDPOINT
+    return boto3.client("s3", **kwargs)
+
+
+def _create_unoserver_pool():
+    """Create a pool of clients of every configured unoserver instance"""
+    clients = [
+        UnoserverClient(
+            url,
+            pool_size=Config.UNOSERVER_POOL_SIZE,
+            connect_timeout=Config.UNOSERVER_CONNECT_TIMEOUT,
+            timeout=Config.UNOSERVER_TIMEOUT,
+            timeout_per_mb=Config.UNOSERVER_TIMEOUT_PER_MB,
+        )
+        for url in Config.UNOSERVER_URLS
+    ]
+    kwargs = {
+        "concurrency": Config.UNOSERVER_CONCURRENCY,
+        "queue_timeout": Config.UNOSERVER_QUEUE_TIMEOUT,
+        "cooldown": Config.UNOSERVER_FAILOVER_COOLDOWN,
+    }
+    if Config.REDIS_URL:
+        # Balance over the conversions of every web worker
+        return RedisUnoserverPool(
+            clients,
+            get_redis=lambda: client_registry.get("redis"),
+            slot_ttl=Config.UNOSERVER_SLOT_TTL,
+            **kwargs,
+        )
+    return UnoserverPool(clients, **kwargs)
+
+
+client_registry = ClientRegistry()
+
+client_registry.register(
+    "pinecone",
+    lambda: Pinecone(api_key=Config.PINECONE_API_KEY),
+)
+client_registry.register(
+    "pinecone_index",
+    lambda: client_registry.get("pinecone").Index(Config.PINECONE_INDEX),
+    health_check=lambda index: index.describe_index_stats(),
+)
+client_registry.register(
+    "mongo",
+    lambda: MongoClient(Config.MONGO_DB_URL, maxPoolSize=Config.MONGO_MAX_POOL_SIZE),
+    close=lambda client: client.close(),
+    health_check=lambda client: client.admin.command("ping"),
+)
+client_registry.register(
+    "s3",
+    _create_s3_client,
+    health_check=lambda client: client.head_bucket(Bucket=Config.S3_BUCKET),
+)
+client_registry.register(
+    "redis",
+    lambda: redis.Redis.from_url(Config.REDIS_URL),
+    close=lambda client: client.close(),
+    health_check=lambda client: client.ping(),
+)
+client_registry.register(
+    "unoserver",
+    _create_unoserver_pool,
+    close=lambda client: client.close(),
+    health_check=lambda client: client.health_check(),
+    # The pool tracks the conversions in flight, replacing it would let new
+    # ones past the concurrency limit. It marks unhealthy backends itself
+    reset_unhealthy=False,
+)
+
+# Release pooled connections on interpreter shutdown
+atexit.register(client_registry.close_all)
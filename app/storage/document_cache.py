@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+
+from app.config import Config
+from app.storage.clients import client_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class InMemoryDocumentCache:
+    """Content hash -> processed document index kept in process memory"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def get(self, content_hash):
+        """Return the record stored for a content hash, or None"""
+        with self._lock:
+            record = self._records.get(content_hash)
+            return dict(record) if record is not None else None
+
+    def put(self, content_hash, record):
+        """Store the record for a content hash"""
+        with self._lock:
+            self._records[content_hash] = dict(record, created_at=time.time())
+
+
+class MongoDocumentCache:
+    """Content hash -> processed document index persisted in MongoDB"""
+
+    def __init__(self, db_name=None, collection_name="document_hashes"):
+        self.db_name = db_name or Config.MONGO_DB_NAME
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        # The content hash is the document _id, which MongoDB always indexes
+        return client_registry.get("mongo")[self.db_name][self.collection_name]
+
+    def get(self, content_hash):
+        """Return the record stored for a content hash, or None"""
+        record = self.collection.find_one({"_id": content_hash})
+        if record is None:
+            return None
+        record.pop("_id", None)
+        return record
+
+    def put(self, content_hash, record):
+        """Store the record for a content hash"""
+        self.collection.replace_one(
+            {"_id": content_hash},
+            dict(record, created_at=time.time()),
+            upsert=True,
+        )
+
+
+def get_document_cache():
+    """
+    Return the document cache for the current configuration
+
+    Returns:
+        A MongoDB backed cache if MongoDB is configured, an in-memory one otherwise
+    """
+    if Config.MONGO_DB_URL:
+        return MongoDocumentCache()
+    logger.warning("MONGO_DB_URL not set, using in-memory document cache")
+    return InMemoryDocumentCache()
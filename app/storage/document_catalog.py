@@ -0,0 +1,204 @@
+import base64
+import json
+import logging
+import threading
+import time
+
+from pymongo import DESCENDING
+
+from app.config import Config
+from app.storage.clients import client_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Catalog fields exposed by /getDocuments, mapped to their stored names
+DOCUMENT_FIELDS = {
+    "title": "title",
+    "preview": "preview",
+    "previewStatus": "preview_status",
+    "length": "length",
+    "filename": "filename",
+    "createdAt": "created_at",
+}
+
+# Values returned for fields missing from a stored record
+DOCUMENT_FIELD_DEFAULTS = {
+    "title": "Unknown",
+    "preview": "No preview available",
+    "previewStatus": "excerpt",
+    "length": 0,
+    "filename": "Unknown",
+    "createdAt": None,
+}
+
+
+def encode_cursor(record):
+    """Encode the position after a record as an opaque pagination cursor"""
+    position = json.dumps([record["created_at"], record["_id"]])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor
+
+    Returns:
+        tuple: (created_at, doc_id) of the last record of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(created_at), str(doc_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def format_document(record, fields=None):
+    """
+    Convert a stored record into the /getDocuments representation
+
+    Args:
+        record: Stored catalog record
+        fields: Public field names to include (default: all)
+
+    Returns:
+        dict: Document with its "id" and the requested fields
+    """
+    document = {"id": record["_id"]}
+    for field in fields or DOCUMENT_FIELDS:
+        document[field] = record.get(
+            DOCUMENT_FIELDS[field], DOCUMENT_FIELD_DEFAULTS[field]
+        )
+    return document
+
+
+class InMemoryDocumentCatalog:
+    """Document catalog kept in process memory (tests and local runs)"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, doc_id, fields):
+        """Create or replace the metadata of a document"""
+        with self._lock:
+            created_at = self._records.get(doc_id, {}).get("created_at", time.time())
+            self._records[doc_id] = dict(fields, _id=doc_id, created_at=created_at)
+
+    def update(self, doc_id, fields):
+        """Update some metadata fields of an existing document"""
+        with self._lock:
+            if doc_id in self._records:
+                self._records[doc_id].update(fields)
+
+    def list(self, limit, cursor=None, fields=None):
+        """
+        List documents, newest first
+
+        Args:
+            limit: Maximum number of documents to return
+            cursor: Cursor returned with the previous page
+            fields: Public field names to include (default: all)
+
+        Returns:
+            tuple: (documents, cursor of the next page or None)
+        """
+        with self._lock:
+            records = sorted(
+                self._records.values(),
+                key=lambda record: (record["created_at"], record["_id"]),
+                reverse=True,
+            )
+        if cursor is not None:
+            position = decode_cursor(cursor)
+            records = [
+                record
+                for record in records
+                if (record["created_at"], record["_id"]) < position
+            ]
+
+        page = records[: limit + 1]
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return [format_document(record, fields) for record in page[:limit]], next_cursor
+
+
+class MongoDocumentCatalog:
+    """Document catalog persisted in MongoDB"""
+
+    def __init__(self, db_name=None, collection_name="documents"):
+        self.db_name = db_name or Config.MONGO_DB_NAME
+        self.collection_name = collection_name
+        self._indexes_created = False
+
+    @property
+    def collection(self):
+        collection = client_registry.get("mongo")[self.db_name][self.collection_name]
+        if not self._indexes_created:
+            # The doc id is the _id, which MongoDB always indexes
+            collection.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+            self._indexes_created = True
+        return collection
+
+    def upsert(self, doc_id, fields):
+        """Create or replace the metadata of a document"""
+        fields = {key: value for key, value in fields.items() if key != "created_at"}
+        self.collection.update_one(
+            {"_id": doc_id},
+            {"$set": fields, "$setOnInsert": {"created_at": time.time()}},
+            upsert=True,
+        )
+
+    def update(self, doc_id, fields):
+        """Update some metadata fields of an existing document"""
+        self.collection.update_one({"_id": doc_id}, {"$set": fields})
+
+    def list(self, limit, cursor=None, fields=None):
+        """
+        List documents, newest first
+
+        Args:
+            limit: Maximum number of documents to return
+            cursor: Cursor returned with the previous page
+            fields: Public field names to include (default: all)
+
+        Returns:
+            tuple: (documents, cursor of the next page or None)
+        """
+        query = {}
+        if cursor is not None:
+            created_at, doc_id = decode_cursor(cursor)
+            query = {
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": doc_id}},
+                ]
+            }
+
+        # created_at is always read since the next cursor is built from it
+        projection = {"created_at": 1}
+        for field in fields or DOCUMENT_FIELDS:
+            projection[DOCUMENT_FIELDS[field]] = 1
+
+        page = list(
+            self.collection.find(query, projection)
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+        )
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return [format_document(record, fields) for record in page[:limit]], next_cursor
+
+
+def get_document_catalog():
+    """
+    Return the document catalog for the current configuration
+
+    Returns:
+        A MongoDB backed catalog if MongoDB is configured, an in-memory one otherwise
+    """
+    if Config.MONGO_DB_URL:
+        return MongoDocumentCatalog()
+    logger.warning("MONGO_DB_URL not set, using in-memory document catalog")
+    return InMemoryDocumentCatalog()
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+
+from pymongo import ReplaceOne
+
+from app.config import Config
+from app.storage.clients import client_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def embedding_cache_key(model_name, text):
+    """
+    Build the cache key of a text embedded by a model
+
+    Args:
+        model_name: Name of the embedding model
+        text: Embedded text
+
+    Returns:
+        str: SHA-256 hex digest of model name and text
+    """
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class LocalEmbeddingCache:
+    """Embedding cache stored in a local SQLite file"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Path of the SQLite file (default: Config.EMBEDDING_CACHE_PATH)
+        """
+        self.path = path or Config.EMBEDDING_CACHE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Return a dict of key -> vector for the keys found in the cache"""
+        keys = list(keys)
+        rows = []
+        # Stay below SQLite's limit on the number of query parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows += self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+        return {key: array("d", vector).tolist() for key, vector in rows}
+
+    def put_many(self, items):
+        """Store a dict of key -> vector"""
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("d", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+
+class MongoEmbeddingCache:
+    """Embedding cache shared between hosts through MongoDB"""
+
+    def __init__(self, db_name=None, collection_name="embedding_cache"):
+        self.db_name = db_name or Config.MONGO_DB_NAME
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        # The cache key is the document _id, which MongoDB always indexes
+        return client_registry.get("mongo")[self.db_name][self.collection_name]
+
+    def get_many(self, keys):
+        """Return a dict of key -> vector for the keys found in the cache"""
+        if not keys:
+            return {}
+        return {
+            record["_id"]: record["vector"]
+            for record in self.collection.find({"_id": {"$in": list(keys)}})
+        }
+
+    def put_many(self, items):
+        """Store a dict of key -> vector"""
+        if not items:
+            return
+        self.collection.bulk_write(
+            [
+                ReplaceOne({"_id": key}, {"_id": key, "vector": vector}, upsert=True)
+                for key, vector in items.items()
+            ],
+            ordered=False,
+        )
+
+
+def get_embedding_cache():
+    """
+    Return the embedding cache selected by Config.EMBEDDING_CACHE_BACKEND
+
+    Returns:
+        A cache backend, or None if caching is disabled
+    """
+    backend = Config.EMBEDDING_CACHE_BACKEND.lower()
+    if backend == "mongo":
+        return MongoEmbeddingCache()
+    if backend == "local":
+        return LocalEmbeddingCache()
+    if backend != "none":
+        logger.warning(f"Unknown embedding cache backend {backend}, caching disabled")
+    return None
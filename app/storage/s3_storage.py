@@ -1,31 +1,39 @@
 import os
+import threading
 from urllib.parse import urlparse
 
-import boto3
-
 from app.config import Config
+from app.storage.clients import client_registry
+
+# Buckets already verified to exist (for MinIO)
+_checked_buckets = set()
+_checked_buckets_lock = threading.Lock()
 
 
 def get_s3_client():
     """
-    Initialize S3 client based on environment
-    Returns an S3 client configured for either MinIO (local) or AWS S3
+    Return the shared S3 client
+    The client is configured for either MinIO (local) or AWS S3
     """
-    if Config.IS_LOCAL:
-        # Use MinIO for local development
-        return boto3.client(
-            "s3",
-            endpoint_url=Config.MINIO_ENDPOINT,
-            aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
-        )
-    else:
-        # Use AWS S3 for production
-        return boto3.client(
-            "s3",
-            aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
-        )
+    return client_registry.get("s3")
+
+
+def ensure_bucket(s3, bucket_name):
+    """
+    Create a bucket if it doesn't exist, checking each bucket only once
+
+    Args:
+        s3: S3 client
+        bucket_name: Name of the S3 bucket
+    """
+    with _checked_buckets_lock:
+        if bucket_name in _checked_buckets:
+            return
+        try:
+            s3.head_bucket(Bucket=bucket_name)
+        except Exception:
+            s3.create_bucket(Bucket=bucket_name)
+        _checked_buckets.add(bucket_name)
 
 
 def upload_file_to_s3(file_path, bucket_name, object_name=None):
@@ -49,10 +57,7 @@ def upload_file_to_s3(file_path, bucket_name, object_name=None):
 
     # Create bucket if it doesn't exist (for MinIO)
     if Config.IS_LOCAL:
-        try:
-            s3.head_bucket(Bucket=bucket_name)
-        except:
-            s3.create_bucket(Bucket=bucket_name)
+        ensure_bucket(s3, bucket_name)
 
     # Upload the file to S3
     try:
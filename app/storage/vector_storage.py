@@ -1,20 +1,146 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from llama_index import StorageContext
 from llama_index.storage.docstore import MongoDocumentStore
 from llama_index.storage.index_store import MongoIndexStore
-from llama_index.vector_stores.pinecone import PineconeVectorStore
-from pinecone import Pinecone
+from llama_index.storage.kvstore.mongodb_kvstore import MongoDBKVStore
+from llama_index.vector_stores.pinecone import (
+    ID_KEY,
+    METADATA_KEY,
+    VECTOR_KEY,
+    PineconeVectorStore,
+)
+from llama_index.vector_stores.utils import node_to_metadata_dict
 
 from app.config import Config
+from app.storage.clients import client_registry
+from app.utils.retry import retry_with_backoff
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Shared pool sending vector batches to Pinecone concurrently
+upsert_executor = ThreadPoolExecutor(
+    max_workers=Config.PINECONE_UPSERT_WORKERS, thread_name_prefix="pinecone-upsert"
+)
+
+
+@retry_with_backoff(max_retries=3, initial_delay=1)
+def _upsert_batch(pinecone_index, batch, namespace):
+    """Upsert a single batch of vectors, retried on failure"""
+    pinecone_index.upsert(vectors=batch, namespace=namespace)
+    return len(batch)
+
+
+def upsert_vectors(
+    pinecone_index, vectors, namespace=None, batch_size=None, max_workers=None
+):
+    """
+    Upsert vectors in fixed-size batches, sending several batches at once
+
+    Args:
+        pinecone_index: Pinecone index handle
+        vectors: List of vector dicts (id, values, metadata)
+        namespace: Namespace to write into
+        batch_size: Vectors per request (default: Config.PINECONE_UPSERT_BATCH_SIZE)
+        max_workers: Batches in flight at once
+            (default: Config.PINECONE_UPSERT_WORKERS)
+
+    Returns:
+        int: Number of vectors upserted
+    """
+    batch_size = batch_size or Config.PINECONE_UPSERT_BATCH_SIZE
+    max_workers = max_workers or Config.PINECONE_UPSERT_WORKERS
+    batches = [
+        vectors[start : start + batch_size]
+        for start in range(0, len(vectors), batch_size)
+    ]
+
+    start_time = time.time()
+    if len(batches) <= 1 or max_workers <= 1:
+        upserted = sum(
+            _upsert_batch(pinecone_index, batch, namespace) for batch in batches
+        )
+    else:
+        # Bound in-flight batches per call even though the pool is shared
+        upserted = 0
+        for start in range(0, len(batches), max_workers):
+            futures = [
+                upsert_executor.submit(_upsert_batch, pinecone_index, batch, namespace)
+                for batch in batches[start : start + max_workers]
+            ]
+            upserted += sum(future.result() for future in futures)
+
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Upserted {upserted} vectors in {len(batches)} batches in {elapsed:.2f}s"
+        f" ({upserted / elapsed if elapsed else 0:.0f} vectors/s)"
+    )
+    return upserted
+
+
+class BatchedPineconeVectorStore(PineconeVectorStore):
+    """Pinecone vector store writing embeddings through upsert_vectors"""
+
+    def add(self, embedding_results):
+        """
+        Add embedding results to the index in concurrent batches
+
+        Args:
+            embedding_results: List of NodeWithEmbedding
+        """
+        if self._add_sparse_vector:
+            # Sparse vectors are not used here, keep the stock code path for them
+            return super().add(embedding_results)
+
+        ids = []
+        entries = []
+        for result in embedding_results:
+            metadata = node_to_metadata_dict(result.node)
+            metadata[self._text_key] = result.node.text or ""
+            entries.append(
+                {
+                    ID_KEY: result.id,
+                    VECTOR_KEY: result.embedding,
+                    METADATA_KEY: metadata,
+                }
+            )
+            ids.append(result.id)
+
+        upsert_vectors(self._pinecone_index, entries, namespace=self._namespace)
+        return ids
 
 
 def get_pinecone_client():
     """
-    Initialize and return a Pinecone client
+    Return the shared Pinecone client
 
     Returns:
         An initialized Pinecone client
     """
-    return Pinecone(api_key=Config.PINECONE_API_KEY)
+    return client_registry.get("pinecone")
+
+
+def get_pinecone_index():
+    """
+    Return the shared handle to the configured Pinecone index
+
+    Returns:
+        A Pinecone index handle
+    """
+    return client_registry.get("pinecone_index")
+
+
+def get_mongo_kvstore():
+    """
+    Return a Mongo key-value store backed by the shared Mongo client
+
+    Returns:
+        A MongoDBKVStore using the pooled client
+    """
+    return MongoDBKVStore(mongo_client=client_registry.get("mongo"))
 
 
 def get_vector_store(namespace):
@@ -27,14 +153,11 @@ def get_vector_store(namespace):
     Returns:
         An initialized vector store
     """
-    # Initialize Pinecone
-    pc = get_pinecone_client()
-
-    # Get the Pinecone index
-    pinecone_index = pc.Index(Config.PINECONE_INDEX)
+    # Get the shared Pinecone index
+    pinecone_index = get_pinecone_index()
 
     # Create the vector store with the specified namespace
-    return PineconeVectorStore(
+    return BatchedPineconeVectorStore(
         pinecone_index=pinecone_index,
         namespace=namespace,
     )
@@ -47,7 +170,7 @@ def get_document_store():
     Returns:
         An initialized document store
     """
-    return MongoDocumentStore.from_uri(uri=Config.MONGO_DB_URL)
+    return MongoDocumentStore(get_mongo_kvstore())
 
 
 def get_index_store():
@@ -57,7 +180,7 @@ def get_index_store():
     Returns:
         An initialized index store
     """
-    return MongoIndexStore.from_uri(uri=Config.MONGO_DB_URL)
+    return MongoIndexStore(get_mongo_kvstore())
 
 
 def get_storage_context(namespace) -> StorageContext:
@@ -1,11 +1,17 @@
 import functools
 import logging
 import os
+import shutil
+import tempfile
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from app.config import Config
+from app.storage.clients import client_registry
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -96,39 +102,128 @@ def convert_ppt_to_pdf(ppt_file_path, pdf_file_path):
         ValueError: If conversion fails
         requests.RequestException: On connection error
     """
-    unoserver_url = os.getenv("UNOSERVER_URL", "http://unoserver:2004")
-
-    logger.info(f"Converting {ppt_file_path} to {pdf_file_path} using {unoserver_url}")
-    with open(ppt_file_path, "rb") as f:
-        resp = requests.post(
-            f"{unoserver_url}/request",
-            files={"file": f},
-            data={"convert-to": "pdf"},
-            timeout=60,
-        )
-
-    if resp.status_code != 200:
-        error_msg = f"Unoserver conversion failed with status {resp.status_code}"
-        logger.error(f"{error_msg}: {resp.text}")
-        raise ValueError(error_msg)
-
-    # Save PDF content to file
-    with open(pdf_file_path, "wb") as f:
-        f.write(resp.content)
+    logger.info(f"Converting {ppt_file_path} to {pdf_file_path} using unoserver")
+    client_registry.get("unoserver").convert(ppt_file_path, pdf_file_path)
     logger.info(f"Conversion successful, saved to {pdf_file_path}")
     return pdf_file_path
 
 
-def ppt_preview(ppt_file_path, preview_file_path):
+def _render_page_range(pdf_file_path, base_path, first_page, last_page, options):
     """
-    Generate preview images from a PowerPoint file
+    Render a range of PDF pages straight to JPEG files with one poppler process
+
+    Args:
+        pdf_file_path: Path to the PDF file
+        base_path: Preview path without extension, pages are saved as
+            <base_path>-<page index>.jpg
+        first_page: First page to render (1-based)
+        last_page: Last page to render (1-based, inclusive)
+        options: Keyword arguments for convert_from_path (dpi, size, jpegopt)
+
+    Returns:
+        List of (page index, image path) tuples
+    """
+    # Render into a private folder, poppler picks its own file names
+    chunk_dir = tempfile.mkdtemp(dir=os.path.dirname(base_path) or None)
+    try:
+        rendered_paths = convert_from_path(
+            pdf_file_path,
+            output_folder=chunk_dir,
+            first_page=first_page,
+            last_page=last_page,
+            fmt="jpeg",
+            output_file="page",
+            paths_only=True,
+            **options,
+        )
+
+        pages = []
+        for offset, rendered_path in enumerate(rendered_paths):
+            page_index = first_page - 1 + offset
+            fname = f"{base_path}-{page_index}.jpg"
+            os.replace(rendered_path, fname)
+            pages.append((page_index, fname))
+        return pages
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+
+def render_pdf_pages(
+    pdf_file_path,
+    preview_file_path,
+    dpi=None,
+    max_width=None,
+    quality=None,
+    chunk_size=None,
+    workers=None,
+):
+    """
+    Render PDF pages to JPEG files in parallel chunks
+
+    Pages are written to disk by poppler and never loaded into memory here, so
+    peak memory depends on the number of workers, not on the number of pages.
+
+    Args:
+        pdf_file_path: Path to the PDF file
+        preview_file_path: Base path for preview images
+        dpi: Render resolution (default: Config.PREVIEW_DPI)
+        max_width: Scale pages to this width in pixels, 0 keeps the DPI size
+            (default: Config.PREVIEW_MAX_WIDTH)
+        quality: JPEG quality (default: Config.PREVIEW_JPEG_QUALITY)
+        chunk_size: Pages rendered per poppler process
+            (default: Config.PREVIEW_CHUNK_SIZE)
+        workers: Poppler processes run in parallel
+            (default: Config.PREVIEW_RENDER_WORKERS)
+
+    Yields:
+        (page index, image path) tuples as their chunk finishes rendering
+    """
+    dpi = dpi or Config.PREVIEW_DPI
+    max_width = Config.PREVIEW_MAX_WIDTH if max_width is None else max_width
+    quality = quality or Config.PREVIEW_JPEG_QUALITY
+    chunk_size = chunk_size or Config.PREVIEW_CHUNK_SIZE
+    workers = workers or Config.PREVIEW_RENDER_WORKERS
+
+    options = {"dpi": dpi, "jpegopt": {"quality": quality, "optimize": True}}
+    if max_width:
+        options["size"] = (max_width, None)
+
+    page_count = pdfinfo_from_path(pdf_file_path)["Pages"]
+    base_path = os.path.splitext(preview_file_path)[0]
+    chunks = [
+        (first_page, min(first_page + chunk_size - 1, page_count))
+        for first_page in range(1, page_count + 1, chunk_size)
+    ]
+    logger.info(
+        f"Rendering {page_count} pages of {pdf_file_path} in {len(chunks)} chunks"
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _render_page_range,
+                pdf_file_path,
+                base_path,
+                first_page,
+                last_page,
+                options,
+            )
+            for first_page, last_page in chunks
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def iter_ppt_preview(ppt_file_path, preview_file_path):
+    """
+    Generate preview images from a PowerPoint file, yielding each as it is ready
 
     Args:
         ppt_file_path: Path to the PowerPoint file
         preview_file_path: Base path for preview images
 
-    Returns:
-        List of paths to generated preview images
+    Yields:
+        (slide index, image path) tuples in the order slides finish rendering
     """
     # Check the file extension
     if not ppt_file_path.endswith((".ppt", ".pptx")):
@@ -141,16 +236,8 @@ def ppt_preview(ppt_file_path, preview_file_path):
         # Convert PowerPoint to PDF using unoserver REST API with retry logic
         convert_ppt_to_pdf(ppt_file_path, pdf_file_path)
 
-        # Convert PDF to list of images
-        images = convert_from_path(pdf_file_path)
-
-        preview_file_paths = []
-        for i, image in enumerate(images):
-            fname = os.path.splitext(preview_file_path)[0] + f"-{i}.jpg"
-            image.save(fname, "JPEG")
-            preview_file_paths.append(fname)
-
-        return preview_file_paths
+        # Render PDF pages straight to image files
+        yield from render_pdf_pages(pdf_file_path, preview_file_path)
     finally:
         # Clean up PDF file
         if os.path.exists(pdf_file_path):
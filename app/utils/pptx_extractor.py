@@ -0,0 +1,117 @@
+import logging
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def _iter_shapes(shapes):
+    """Yield the shapes of a slide, descending into groups"""
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _iter_shapes(shape.shapes)
+        else:
+            yield shape
+
+
+def _clean(text):
+    """Strip a text block and drop its empty lines"""
+    lines = (line.strip() for line in text.replace("\x0b", "\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_slide(slide, slide_index, slide_number):
+    """
+    Extract the text content of one slide
+
+    Args:
+        slide: python-pptx slide
+        slide_index: Position of the slide among the visible ones (0-based)
+        slide_number: Position of the slide in the deck, hidden ones included
+            (1-based)
+
+    Returns:
+        dict: slide_index, slide_number, title, texts, tables and notes
+    """
+    title_shape = slide.shapes.title
+    texts = []
+    tables = []
+    for shape in _iter_shapes(slide.shapes):
+        if shape.has_text_frame:
+            text = _clean(shape.text_frame.text)
+            if text:
+                texts.append(text)
+        elif getattr(shape, "has_table", False):
+            rows = [
+                [_clean(cell.text) for cell in row.cells] for row in shape.table.rows
+            ]
+            tables.append([row for row in rows if any(row)])
+
+    notes = ""
+    if slide.has_notes_slide:
+        notes_frame = slide.notes_slide.notes_text_frame
+        if notes_frame is not None:
+            notes = _clean(notes_frame.text)
+
+    return {
+        "slide_index": slide_index,
+        "slide_number": slide_number,
+        "title": _clean(title_shape.text) if title_shape is not None else "",
+        "texts": texts,
+        "tables": [table for table in tables if table],
+        "notes": notes,
+    }
+
+
+def format_slide(slide):
+    """
+    Render an extracted slide as plain text for indexing
+
+    Table rows become " | " separated lines and speaker notes follow the
+    slide content.
+
+    Args:
+        slide: Slide dict as yielded by iter_slides
+
+    Returns:
+        str: Slide text, empty if the slide has no text at all
+    """
+    parts = list(slide["texts"])
+    for table in slide["tables"]:
+        parts.append("\n".join(" | ".join(row) for row in table))
+    if slide["notes"]:
+        parts.append(f"Notes: {slide['notes']}")
+    return "\n\n".join(parts)
+
+
+def iter_slides(file_path):
+    """
+    Extract the text of a PPTX deck slide by slide
+
+    Reads the file with python-pptx only, no LibreOffice or OCR involved.
+    Hidden slides are skipped.
+
+    Args:
+        file_path: Path to the PPTX file
+
+    Yields:
+        dict: slide_index (0-based, among the visible slides), slide_number
+            (1-based, as numbered in the deck), title, texts (text blocks in
+            shape order), tables (rows of cell texts) and notes
+    """
+    presentation = Presentation(file_path)
+    # LibreOffice leaves hidden slides out of the PDF, so they are skipped and
+    # slide_index counts visible slides only to match the preview images,
+    # while slide_number stays the number the deck's author sees
+    slide_index = 0
+    for slide_number, slide in enumerate(presentation.slides, start=1):
+        if slide._element.get("show") == "0":
+            continue
+        try:
+            yield _extract_slide(slide, slide_index, slide_number)
+        except Exception as e:
+            # One odd shape shouldn't lose the text of the whole deck
+            logger.warning(f"Failed to extract slide {slide_number}: {str(e)}")
+        slide_index += 1
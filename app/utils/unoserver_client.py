@@ -0,0 +1,543 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class MultipartFileBody:
+    """
+    multipart/form-data body streamed from a file
+
+    requests sends an iterable with a length as a plain (not chunked) body,
+    so the deck is read from disk in chunks while it is uploaded instead of
+    being loaded into memory first.
+    """
+
+    def __init__(self, file_path, field_name="file", fields=None, chunk_size=65536):
+        """
+        Args:
+            file_path: File sent as the file part
+            field_name: Form field name of the file part
+            fields: Extra form fields sent before the file
+            chunk_size: Bytes read from the file at a time
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        head = []
+        for name, value in (fields or {}).items():
+            head.append(
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        head.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; '
+            f'filename="{os.path.basename(file_path)}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._length = len(self._head) + os.path.getsize(file_path) + len(self._tail)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        yield self._head
+        with open(self.file_path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield self._tail
+
+
+class UnoserverClient:
+    """Client of the unoserver REST API with a persistent connection pool"""
+
+    def __init__(
+        self,
+        base_url,
+        pool_size=8,
+        connect_timeout=5,
+        timeout=60,
+        timeout_per_mb=10,
+        chunk_size=65536,
+    ):
+        """
+        Args:
+            base_url: URL of the unoserver instance
+            pool_size: Maximum number of pooled connections
+            connect_timeout: Seconds to wait for a connection
+            timeout: Seconds to wait for the converted file of an empty deck
+            timeout_per_mb: Extra seconds to wait per MiB of the deck
+            chunk_size: Bytes sent and written at a time
+        """
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.timeout_per_mb = timeout_per_mb
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout_for(self, size):
+        """
+        Return the (connect, read) timeout for converting a file
+
+        Args:
+            size: Size of the input file in bytes
+        """
+        return (
+            self.connect_timeout,
+            self.timeout + self.timeout_per_mb * size / (1024 * 1024),
+        )
+
+    def convert(self, input_path, output_path, convert_to="pdf"):
+        """
+        Convert a file, streaming it to unoserver and the result to disk
+
+        Args:
+            input_path: Path to the file to convert
+            output_path: Path where the converted file is saved
+            convert_to: Target format
+
+        Returns:
+            Path to the converted file
+
+        Raises:
+            ValueError: If unoserver answers with an error
+            requests.RequestException: On connection error, timeout or a cut off
+                download
+        """
+        body = MultipartFileBody(
+            input_path, fields={"convert-to": convert_to}, chunk_size=self.chunk_size
+        )
+        start_time = time.time()
+        with self.session.post(
+            f"{self.base_url}/request",
+            data=body,
+            headers={"Content-Type": body.content_type},
+            timeout=self.timeout_for(os.path.getsize(input_path)),
+            stream=True,
+        ) as resp:
+            if resp.status_code != 200:
+                error_msg = (
+                    f"Unoserver conversion failed with status {resp.status_code}"
+                )
+                logger.error(f"{error_msg}: {resp.text}")
+                raise ValueError(error_msg)
+
+            # Write next to the target, a failed download leaves no partial file
+            partial_path = f"{output_path}.part"
+            # Content-Length counts encoded bytes, only plain bodies are checked
+            expected_size = (
+                None
+                if "Content-Encoding" in resp.headers
+                else resp.headers.get("Content-Length")
+            )
+            try:
+                size = 0
+                with open(partial_path, "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                        size += len(chunk)
+                # urllib3 1.x ends a cut off body silently instead of raising
+                if expected_size is not None and size != int(expected_size):
+                    raise requests.ConnectionError(
+                        f"Unoserver response ended after {size} of "
+                        f"{expected_size} bytes"
+                    )
+                os.replace(partial_path, output_path)
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+        logger.info(
+            f"Converted {input_path} to {convert_to} in {time.time() - start_time:.2f}s"
+        )
+        return output_path
+
+    def health_check(self):
+        """Raise if unoserver can't be reached, any HTTP answer counts as up"""
+        # LibreOffice answers slowly while converting, only the connect is short
+        self.session.get(
+            self.base_url, timeout=(self.connect_timeout, self.timeout)
+        ).close()
+
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+
+
+class UnoserverBackend:
+    """One unoserver instance of an UnoserverPool with its load and health"""
+
+    def __init__(self, client):
+        self.client = client
+        self.outstanding = 0
+        self.conversions = 0
+        self.failures = 0
+        self.latency = None
+        self.down_until = 0
+
+    @property
+    def healthy(self):
+        return time.time() >= self.down_until
+
+    def stats(self):
+        return {
+            "outstanding": self.outstanding,
+            "healthy": self.healthy,
+            "conversions": self.conversions,
+            "failures": self.failures,
+            "latency_ms": round(self.latency * 1000) if self.latency else None,
+        }
+
+
+class UnoserverPool:
+    """
+    Spread conversions over several unoserver instances
+
+    LibreOffice converts one document at a time, so every backend takes at
+    most `concurrency` conversions and further ones wait in a queue. A waiting
+    conversion goes to the healthy backend with the fewest outstanding
+    requests, ties broken by the lower average latency. Backends failing with
+    a connection error are skipped for `cooldown` seconds.
+
+    The load and health are kept in this process. Under several gunicorn
+    workers each worker balances on its own and every backend can get
+    `concurrency` conversions per worker, use RedisUnoserverPool there.
+    """
+
+    def __init__(
+        self, clients, concurrency=1, queue_timeout=300, cooldown=30, latency_decay=0.2
+    ):
+        """
+        Args:
+            clients: UnoserverClient of every backend
+            concurrency: Conversions sent to one backend at a time
+            queue_timeout: Seconds a conversion waits for a free backend
+            cooldown: Seconds a failed backend is skipped
+            latency_decay: Weight of the newest conversion in the average latency
+        """
+        self.backends = [UnoserverBackend(client) for client in clients]
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.cooldown = cooldown
+        self.latency_decay = latency_decay
+        self.queued = 0
+        self._condition = threading.Condition()
+
+    def _pick(self):
+        """Return the least loaded backend with a free slot, or None"""
+        candidates = [
+            backend
+            for backend in self.backends
+            if backend.outstanding < self.concurrency and backend.healthy
+        ]
+        if not candidates and not any(backend.healthy for backend in self.backends):
+            # Everything is cooling down, better to retry one than to fail
+            candidates = [
+                backend
+                for backend in self.backends
+                if backend.outstanding < self.concurrency
+            ]
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda backend: (backend.outstanding, backend.latency or 0),
+        )
+
+    def _acquire(self):
+        """Wait for a free backend and return it with its slot"""
+        deadline = time.time() + self.queue_timeout
+        with self._condition:
+            self.queued += 1
+            try:
+                while True:
+                    backend = self._pick()
+                    if backend is not None:
+                        backend.outstanding += 1
+                        return backend, None
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"No unoserver backend free after {self.queue_timeout}s"
+                        )
+                    # Also wake up when a cooling down backend may be usable again
+                    self._condition.wait(min(remaining, self.cooldown))
+            finally:
+                self.queued -= 1
+
+    def _release(self, backend, slot, elapsed=None, failed=False):
+        """Free the slot of a conversion and record how it went"""
+        with self._condition:
+            backend.outstanding -= 1
+            if failed:
+                backend.failures += 1
+                backend.down_until = time.time() + self.cooldown
+            elif elapsed is not None:
+                backend.conversions += 1
+                backend.down_until = 0
+                backend.latency = self._average_latency(backend.latency, elapsed)
+            self._condition.notify()
+
+    def _average_latency(self, latency, elapsed):
+        if latency is None:
+            return elapsed
+        return self.latency_decay * elapsed + (1 - self.latency_decay) * latency
+
+    def convert(self, input_path, output_path, convert_to="pdf"):
+        """
+        Convert a file on the least loaded backend, waiting for a free one
+
+        Raises:
+            TimeoutError: If no backend got free within queue_timeout
+            ValueError: If unoserver answers with an error
+            requests.RequestException: On connection error or timeout
+        """
+        backend, slot = self._acquire()
+        start_time = time.time()
+        try:
+            result = backend.client.convert(input_path, output_path, convert_to)
+        except requests.ConnectionError:
+            logger.warning(f"Unoserver {backend.client.base_url} is unreachable")
+            self._release(backend, slot, failed=True)
+            raise
+        except Exception:
+            # A deck that fails to convert doesn't make the backend unhealthy
+            self._release(backend, slot)
+            raise
+        self._release(backend, slot, elapsed=time.time() - start_time)
+        return result
+
+    def stats(self):
+        """Return the queue depth and the load of every backend"""
+        with self._condition:
+            return {
+                "queued": self.queued,
+                "backends": {
+                    backend.client.base_url: backend.stats()
+                    for backend in self.backends
+                },
+            }
+
+    def backend_health(self):
+        """Return every backend URL mapped to True if it is healthy"""
+        with self._condition:
+            return {
+                backend.client.base_url: backend.healthy for backend in self.backends
+            }
+
+    def _idle_backends(self):
+        with self._condition:
+            return [backend for backend in self.backends if not backend.outstanding]
+
+    def _set_health(self, backend, healthy):
+        with self._condition:
+            if healthy:
+                backend.down_until = 0
+            else:
+                backend.failures += 1
+                backend.down_until = time.time() + self.cooldown
+            self._condition.notify_all()
+
+    def health_check(self):
+        """
+        Probe the idle backends, marking unreachable ones down
+
+        Backends with conversions in flight aren't probed, they keep the health
+        their last conversion left them in.
+
+        Raises:
+            ConnectionError: If no backend is healthy
+        """
+        for backend in self._idle_backends():
+            try:
+                backend.client.health_check()
+                healthy = True
+            except requests.RequestException as e:
+                logger.warning(
+                    f"Unoserver {backend.client.base_url} failed its health check: "
+                    f"{str(e)}"
+                )
+                healthy = False
+            self._set_health(backend, healthy)
+
+        health = self.backend_health()
+        if not any(health.values()):
+            raise ConnectionError("No unoserver backend reachable")
+
+    def close(self):
+        """Close the pooled connections of every backend"""
+        for backend in self.backends:
+            backend.client.close()
+
+
+class RedisUnoserverPool(UnoserverPool):
+    """
+    UnoserverPool sharing its load and health through Redis
+
+    Every web worker picks from the same slots, so a backend gets at most
+    `concurrency` conversions in total and /metrics/conversions reports all
+    workers. A slot is a Redis key set while its conversion runs. It expires
+    after `slot_ttl` seconds, so the slots of a crashed worker free themselves.
+    """
+
+    def __init__(self, clients, get_redis, slot_ttl=900, poll_interval=0.2, **kwargs):
+        """
+        Args:
+            clients: UnoserverClient of every backend
+            get_redis: Callable returning the shared Redis client
+            slot_ttl: Seconds a conversion holds its slot at most
+            poll_interval: Seconds between looks for a free slot while queued
+            **kwargs: Passed on to UnoserverPool
+        """
+        super().__init__(clients, **kwargs)
+        self.get_redis = get_redis
+        self.slot_ttl = slot_ttl
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def _key(backend, name):
+        return f"slidespeak:unoserver:{backend.client.base_url}:{name}"
+
+    def _slot_keys(self, backend):
+        return [self._key(backend, f"slot:{i}") for i in range(self.concurrency)]
+
+    def _refresh(self):
+        """
+        Load the shared load, health and latency into the local backends
+
+        Returns:
+            dict: Backend mapped to the keys of its free slots
+        """
+        keys = []
+        for backend in self.backends:
+            keys += self._slot_keys(backend)
+            keys += [self._key(backend, "down"), self._key(backend, "latency")]
+        values = iter(self.get_redis().mget(keys))
+
+        free_slots = {}
+        with self._condition:
+            for backend in self.backends:
+                slot_keys = self._slot_keys(backend)
+                taken = [next(values) is not None for _ in slot_keys]
+                down_until, latency = next(values), next(values)
+                free_slots[backend] = [
+                    key for key, is_taken in zip(slot_keys, taken) if not is_taken
+                ]
+                backend.outstanding = sum(taken)
+                backend.down_until = float(down_until) if down_until else 0
+                backend.latency = float(latency) if latency else None
+        return free_slots
+
+    def _acquire(self):
+        """Wait for a free slot on any backend and return it with its backend"""
+        redis = self.get_redis()
+        token = uuid.uuid4().hex
+        deadline = time.time() + self.queue_timeout
+        queue_key = "slidespeak:unoserver:queued"
+        # Waiters are scored by their deadline so crashed ones drop out
+        redis.zadd(queue_key, {token: deadline})
+        try:
+            while True:
+                free_slots = self._refresh()
+                with self._condition:
+                    backend = self._pick()
+                if backend is not None:
+                    for key in free_slots[backend]:
+                        if redis.set(key, token, nx=True, ex=self.slot_ttl):
+                            return backend, (key, token)
+                    # Another worker took the slots first, look again
+                    continue
+                if time.time() >= deadline:
+                    raise TimeoutError(
+                        f"No unoserver backend free after {self.queue_timeout}s"
+                    )
+                time.sleep(self.poll_interval)
+        finally:
+            redis.zrem(queue_key, token)
+
+    def _release(self, backend, slot, elapsed=None, failed=False):
+        """Free the slot of a conversion and record how it went"""
+        redis = self.get_redis()
+        key, token = slot
+        # An expired slot may belong to another conversion by now
+        if redis.get(key) == token.encode("utf-8"):
+            redis.delete(key)
+
+        counts_key = self._key(backend, "counts")
+        if failed:
+            redis.hincrby(counts_key, "failures", 1)
+            self._mark_down(backend)
+        elif elapsed is not None:
+            redis.hincrby(counts_key, "conversions", 1)
+            redis.delete(self._key(backend, "down"))
+            latency = redis.get(self._key(backend, "latency"))
+            # Concurrent updates may drop a sample, fine for a moving average
+            latency = self._average_latency(
+                float(latency) if latency else None, elapsed
+            )
+            redis.set(self._key(backend, "latency"), latency)
+
+    def _mark_down(self, backend):
+        down_until = time.time() + self.cooldown
+        self.get_redis().set(
+            self._key(backend, "down"), down_until, ex=max(1, round(self.cooldown))
+        )
+
+    def _idle_backends(self):
+        self._refresh()
+        return super()._idle_backends()
+
+    def _set_health(self, backend, healthy):
+        if healthy:
+            self.get_redis().delete(self._key(backend, "down"))
+        else:
+            self.get_redis().hincrby(self._key(backend, "counts"), "failures", 1)
+            self._mark_down(backend)
+
+    def stats(self):
+        """Return the queue depth and the load of every backend over all workers"""
+        redis = self.get_redis()
+        queue_key = "slidespeak:unoserver:queued"
+        redis.zremrangebyscore(queue_key, "-inf", time.time())
+        queued = redis.zcard(queue_key)
+        self._refresh()
+        counts = {
+            backend: redis.hgetall(self._key(backend, "counts"))
+            for backend in self.backends
+        }
+        with self._condition:
+            for backend in self.backends:
+                backend.conversions = int(counts[backend].get(b"conversions", 0))
+                backend.failures = int(counts[backend].get(b"failures", 0))
+            return {
+                "queued": queued,
+                "backends": {
+                    backend.client.base_url: backend.stats()
+                    for backend in self.backends
+                },
+            }
+
+    def backend_health(self):
+        """Return every backend URL mapped to True if it is healthy"""
+        self._refresh()
+        return super().backend_health()
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import os
+import uuid
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app.config import Config
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class HashingUploadFile:
+    """
+    File an upload is streamed into while it is parsed
+
+    The part is written next to its final location in DOCUMENTS_DIR, hashed on
+    the way and cut off as soon as it exceeds max_size, so an upload is never
+    spooled to memory or a temp file first. claim() moves it into place,
+    otherwise it is deleted when the request closes it.
+    """
+
+    def __init__(self, directory, max_size):
+        """
+        Args:
+            directory: Directory the file is written to
+            max_size: Maximum number of bytes, 0 for no limit
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.part")
+        self.max_size = max_size
+        self.size = 0
+        self.claimed = False
+        self._hash = hashlib.sha256()
+        self._file = open(self.path, "w+b")
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            self.close()
+            raise RequestEntityTooLarge(
+                f"Uploaded file is larger than {self.max_size} bytes"
+            )
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def hexdigest(self):
+        """SHA-256 hex digest of everything written so far"""
+        return self._hash.hexdigest()
+
+    def claim(self, filepath):
+        """
+        Move the uploaded file to filepath without copying it
+
+        Returns:
+            str: SHA-256 hex digest of the content
+        """
+        self._file.close()
+        os.replace(self.path, filepath)
+        self.claimed = True
+        return self.hexdigest()
+
+    def close(self):
+        """Close the file, deleting it unless it has been claimed"""
+        if not self._file.closed:
+            self._file.close()
+        if not self.claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UploadRequest(Request):
+    """Request streaming uploaded files straight into DOCUMENTS_DIR"""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        return HashingUploadFile(Config.DOCUMENTS_DIR, Config.MAX_UPLOAD_SIZE)
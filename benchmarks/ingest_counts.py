@@ -0,0 +1,177 @@
+"""
+Work done per ingested deck: node parsing, docstore writes and vector upserts
+
+Ingests generated decks through IndexManager.insert_into_index and through
+the former path (a standalone parse plus docstore write, then index.insert
+parsing and storing again), with in-memory stand-ins for Pinecone, MongoDB
+and OpenAI, and counts what each path does per deck.
+
+    python -m benchmarks.ingest_counts
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from unittest import mock
+
+from llama_index import Document, ServiceContext, StorageContext
+from llama_index.embeddings.base import BaseEmbedding
+from llama_index.indices.prompt_helper import PromptHelper
+from llama_index.langchain_helpers.text_splitter import TokenTextSplitter
+from llama_index.node_parser import SimpleNodeParser
+from llama_index.storage.docstore import SimpleDocumentStore
+from pptx import Presentation
+
+from app.core import indexing
+from app.core.indexing import IndexManager
+from app.storage.vector_storage import BatchedPineconeVectorStore
+
+counts = Counter()
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Deterministic embeddings instead of OpenAI requests"""
+
+    def __init__(self):
+        super().__init__(tokenizer=str.split)
+
+    def _get_query_embedding(self, query):
+        return [float(len(query)), 1.0]
+
+    def _get_text_embedding(self, text):
+        counts["embedded texts"] += 1
+        return [float(len(text)), 1.0]
+
+
+class FakePineconeIndex:
+    """Pinecone index handle counting the upserted vectors"""
+
+    def upsert(self, vectors, namespace=None):
+        counts["upsert requests"] += 1
+        counts["vectors upserted"] += len(vectors)
+
+
+class CountingDocumentStore(SimpleDocumentStore):
+    """In-memory docstore counting the nodes written to it"""
+
+    def add_documents(self, docs, allow_update=True):
+        counts["docstore writes"] += len(docs)
+        super().add_documents(docs, allow_update=allow_update)
+
+
+class CountingNodeParser(SimpleNodeParser):
+    """Node parser counting the nodes it produces"""
+
+    def get_nodes_from_documents(self, documents, *args, **kwargs):
+        nodes = super().get_nodes_from_documents(documents, *args, **kwargs)
+        counts["nodes parsed"] += len(nodes)
+        return nodes
+
+
+class FakeCatalog:
+    """Document catalog kept in memory"""
+
+    def upsert(self, doc_id, fields):
+        pass
+
+    def update(self, doc_id, fields):
+        pass
+
+
+def _node_parser():
+    # Whitespace tokens stand in for tiktoken, which downloads its encoding
+    return CountingNodeParser(
+        text_splitter=TokenTextSplitter(chunk_size=64, tokenizer=str.split)
+    )
+
+
+def _service_context(manager):
+    return ServiceContext.from_defaults(
+        embed_model=manager.embed_model,
+        node_parser=_node_parser(),
+        prompt_helper=PromptHelper(tokenizer=str.split),
+    )
+
+
+def _storage_context(namespace):
+    return StorageContext.from_defaults(
+        docstore=CountingDocumentStore(),
+        vector_store=BatchedPineconeVectorStore(
+            pinecone_index=FakePineconeIndex(),
+            namespace=namespace,
+            tokenizer=str.split,
+        ),
+    )
+
+
+def _make_deck(path, slides):
+    presentation = Presentation()
+    for i in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        slide.placeholders[1].text = " ".join(
+            f"point {i}-{j} about the quarterly results" for j in range(30)
+        )
+    presentation.save(path)
+
+
+def _legacy_insert(manager, deck_path, doc_id):
+    """The former insert_into_index, parsing the deck twice"""
+    index = manager.get_index(doc_id)
+    text = "\n\n".join(
+        indexing.format_slide(slide) for slide in indexing.iter_slides(deck_path)
+    )
+    document = Document(text=text)
+    nodes = _node_parser().get_nodes_from_documents([document])
+    index.docstore.add_documents(nodes)
+    document.doc_id = doc_id
+    index.insert(document)
+
+
+def _insert(manager, deck_path, doc_id):
+    manager.insert_into_index(deck_path, doc_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decks", type=int, default=5)
+    parser.add_argument("--slides", type=int, default=20)
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    logging.disable(logging.WARNING)
+
+    with mock.patch.multiple(
+        indexing,
+        get_pinecone_client=lambda: None,
+        get_document_catalog=FakeCatalog,
+        get_embedding_cache=lambda: None,
+        OpenAIEmbedding=FakeEmbedding,
+        get_storage_context=_storage_context,
+    ), mock.patch.multiple(
+        IndexManager,
+        _build_service_context=_service_context,
+        # Summaries are generated by the LLM, off the ingestion path anyway
+        _summarize_document=lambda self, doc_id, text: None,
+    ), mock.patch.object(
+        indexing.Config, "ANSWER_CACHE_ENABLED", False
+    ), tempfile.TemporaryDirectory() as directory:
+        deck_path = os.path.join(directory, "deck.pptx")
+        _make_deck(deck_path, args.slides)
+        manager = IndexManager()
+
+        for name, insert in [("before", _legacy_insert), ("after", _insert)]:
+            counts.clear()
+            start = time.perf_counter()
+            for i in range(args.decks):
+                insert(manager, deck_path, f"{name}-{i}")
+            elapsed = time.perf_counter() - start
+            per_deck = ", ".join(
+                f"{key} {value / args.decks:g}" for key, value in sorted(counts.items())
+            )
+            print(f"{name:>6}: {per_deck} per deck, {elapsed / args.decks:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
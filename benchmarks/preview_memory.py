@@ -0,0 +1,126 @@
+"""
+Peak memory of rendering slide previews, by number of slides
+
+Renders generated PDFs of growing page counts with render_pdf_pages, which
+has poppler write the pages straight to disk, and with the former approach
+of loading every page as an image with convert_from_path. Each run happens
+in a fresh process, peak RSS is reported for it and for the largest poppler
+process. Needs poppler-utils, as the app does.
+
+    python -m benchmarks.preview_memory
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from pdf2image import convert_from_path
+
+from app.utils.file_utils import render_pdf_pages
+
+
+def write_pdf(path, pages, width=960, height=540):
+    """Write a PDF of 16:9 pages, each a colored panel with a title"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for i in range(pages):
+        shade = (i % 10) / 10
+        content = (
+            f"{shade:.1f} 0.4 0.8 rg 60 60 {width - 120} {height - 120} re f "
+            f"BT /F1 48 Tf 1 1 1 rg 100 {height - 140} Td (Slide {i + 1}) Tj ET"
+        ).encode("ascii")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (width, height, len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref_offset = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref_offset)
+        )
+
+
+def _peak_rss_mb(who):
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def _render(pdf_path, directory, approach, dpi):
+    """Render every page of a PDF in this process, return peak RSS and time"""
+    start = time.perf_counter()
+    preview_path = os.path.join(directory, "preview.jpg")
+    if approach == "render_pdf_pages":
+        for _, image_path in render_pdf_pages(pdf_path, preview_path, dpi=dpi):
+            # Uploaded and removed as it arrives, like the preview upload does
+            os.remove(image_path)
+    else:
+        images = convert_from_path(pdf_path, dpi=dpi)
+        for index, image in enumerate(images):
+            image_path = f"{preview_path[:-4]}-{index}.jpg"
+            image.save(image_path, "JPEG")
+            os.remove(image_path)
+    return (
+        _peak_rss_mb(resource.RUSAGE_SELF),
+        _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        time.perf_counter() - start,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument(
+        "--approaches",
+        nargs="+",
+        default=["convert_from_path", "render_pdf_pages"],
+        choices=["convert_from_path", "render_pdf_pages"],
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'approach':>18} {'pages':>6} {'peak RSS MB':>12} "
+        f"{'poppler MB':>11} {'seconds':>8}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            pdf_path = os.path.join(directory, f"deck-{pages}.pdf")
+            write_pdf(pdf_path, pages)
+            for approach in args.approaches:
+                # A fresh process per run, peak RSS never goes down
+                with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                    rss, poppler_rss, seconds = pool.submit(
+                        _render, pdf_path, directory, approach, args.dpi
+                    ).result()
+                print(
+                    f"{approach:>18} {pages:>6} {rss:>12.0f} "
+                    f"{poppler_rss:>11.0f} {seconds:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Calls/s and latency of the index server RPC against the former BaseManager path
+
+Both servers run in their own process and answer an echo method with a small
+payload, shaped like a /query answer. The BaseManager client is used as the
+web workers used it: each call creates a remote object and fetches it with
+_getvalue(), opening new authenticated connections along the way. The
+RPCClient multiplexes calls over its pooled connections. BaseManager calls
+are slow enough to get a smaller sample.
+
+    python -m benchmarks.rpc_throughput
+"""
+import argparse
+import logging
+import socket
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+
+from app.core.rpc import RPCClient, RPCServer
+
+AUTHKEY = b"benchmark-auth-key"
+
+
+def echo(payload):
+    return payload
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_listening(address, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(address, timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server didn't start on {address}")
+
+
+def _serve_base_manager(address):
+    manager = BaseManager(address, AUTHKEY)
+    manager.register("echo", echo)
+    manager.get_server().serve_forever()
+
+
+def _serve_rpc(address):
+    server = RPCServer(address, AUTHKEY, max_workers=64)
+    server.register("echo", echo)
+    server.serve_forever()
+
+
+def _base_manager_client(address):
+    manager = BaseManager(address, AUTHKEY)
+    manager.register("echo")
+    manager.connect()
+    return lambda payload: manager.echo(payload)._getvalue()
+
+
+def _rpc_client(address):
+    client = RPCClient(address, AUTHKEY, pool_size=4)
+    return lambda payload: client.call("echo", (payload,))
+
+
+def _measure(call, payload, calls, threads):
+    def timed_call(_):
+        start = time.perf_counter()
+        call(payload)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = sorted(executor.map(timed_call, range(calls)))
+    elapsed = time.perf_counter() - start
+    return (
+        calls / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--base-manager-calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+    # The readiness probes hang up before the handshake, which the server logs
+    logging.disable(logging.WARNING)
+
+    payload = {
+        "text": "The quarterly results are on slide 4. " * 10,
+        "slides": [{"slideNumber": 4, "slideIndex": 3, "score": 0.87}],
+    }
+    servers = []
+    clients = []
+    for name, serve, connect, calls in [
+        (
+            "BaseManager",
+            _serve_base_manager,
+            _base_manager_client,
+            args.base_manager_calls,
+        ),
+        ("RPC", _serve_rpc, _rpc_client, args.calls),
+    ]:
+        address = ("127.0.0.1", _free_port())
+        server = Process(target=serve, args=(address,), daemon=True)
+        server.start()
+        servers.append(server)
+        _wait_listening(address)
+        clients.append((name, connect(address), calls))
+
+    try:
+        print(
+            f"{'client':>12} {'threads':>8} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}"
+        )
+        for threads in args.threads:
+            for name, call, calls in clients:
+                # Warm up the connections first
+                _measure(call, payload, threads, threads)
+                rate, p50, p99 = _measure(call, payload, calls, threads)
+                print(f"{name:>12} {threads:>8} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f}")
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+RPC round trips and tokens/s of a streamed answer with and without TokenBatcher
+
+An index server in its own process produces a token stream into a
+StreamBuffer, either one chunk per token as before batching or through a
+TokenBatcher with the configured STREAM_BATCH_MAX_CHARS and
+STREAM_BATCH_MAX_DELAY_MS. The client long-polls read_stream over RPC like the
+/stream endpoints do, and every chunk it gets becomes one Server-Sent Event.
+The gap between tokens stands in for the LLM's generation speed.
+
+    python -m benchmarks.token_batching
+"""
+import argparse
+import logging
+import re
+import threading
+import time
+from multiprocessing import Process
+
+from app.config import Config
+from app.core.rpc import RPCClient, RPCServer
+from app.core.streaming import StreamRegistry, TokenBatcher
+from benchmarks.rpc_throughput import AUTHKEY, _free_port, _wait_listening
+
+ANSWER = "The quarterly results are on slide 4, revenue grew by 12 percent. "
+
+
+class TokenStreams:
+    """Index server side, producing token streams on request"""
+
+    def __init__(self):
+        self.streams = StreamRegistry()
+
+    def start_stream(self, tokens, token_delay, batched):
+        stream_id, buffer = self.streams.create()
+        threading.Thread(
+            target=self._produce,
+            args=(buffer, tokens, token_delay, batched),
+            daemon=True,
+        ).start()
+        return stream_id
+
+    def _produce(self, buffer, tokens, token_delay, batched):
+        queue = buffer
+        if batched:
+            queue = TokenBatcher(
+                buffer,
+                max_chars=Config.STREAM_BATCH_MAX_CHARS,
+                max_delay=Config.STREAM_BATCH_MAX_DELAY_MS / 1000,
+            )
+        for token in tokens:
+            if token_delay:
+                time.sleep(token_delay)
+            queue.put(token)
+        if batched:
+            queue.flush()
+        buffer.put(None)
+
+    def read_stream(self, stream_id, offset=0, timeout=0):
+        chunks, done = self.streams.get(stream_id).read(offset, timeout=timeout)
+        return {"chunks": chunks, "done": done}
+
+
+def _serve(address):
+    streams = TokenStreams()
+    server = RPCServer(address, AUTHKEY, max_workers=16)
+    server.register("start_stream", streams.start_stream)
+    server.register("read_stream", streams.read_stream)
+    server.serve_forever()
+
+
+def _measure(client, tokens, token_delay, batched):
+    start = time.perf_counter()
+    stream_id = client.call("start_stream", (tokens, token_delay, batched))
+    round_trips = 1
+    position = 0
+    while True:
+        result = client.call(
+            "read_stream", (stream_id, position, Config.SSE_KEEPALIVE_SECONDS)
+        )
+        round_trips += 1
+        position += len(result["chunks"])
+        if result["done"]:
+            break
+    elapsed = time.perf_counter() - start
+    return round_trips, position, len(tokens) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument(
+        "--token-delays-ms", type=float, nargs="+", default=[0, 1, 5, 20]
+    )
+    args = parser.parse_args()
+    # The readiness probe hangs up before the handshake, which the server logs
+    logging.disable(logging.WARNING)
+
+    words = re.findall(r"\S+\s*", ANSWER)
+    tokens = [words[i % len(words)] for i in range(args.tokens)]
+
+    address = ("127.0.0.1", _free_port())
+    server = Process(target=_serve, args=(address,), daemon=True)
+    server.start()
+    _wait_listening(address)
+    client = RPCClient(address, AUTHKEY, pool_size=1)
+
+    try:
+        # Warm up the connection first
+        _measure(client, tokens[:10], 0, False)
+        print(
+            f"{'delay ms':>9} {'batched':>8} {'round trips':>12} {'events':>8} "
+            f"{'tokens/s':>10}"
+        )
+        for delay_ms in args.token_delays_ms:
+            # Slow token streams only need enough tokens to fill a few batches
+            count = len(tokens) if delay_ms < 5 else len(tokens) // 10
+            for batched in (False, True):
+                round_trips, events, rate = _measure(
+                    client, tokens[:count], delay_ms / 1000, batched
+                )
+                print(
+                    f"{delay_ms:>9g} {str(batched):>8} {round_trips:>12} "
+                    f"{events:>8} {rate:>10.0f}"
+                )
+    finally:
+        client.close()
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Throughput of upsert_vectors against a simulated Pinecone index
+
+Each request costs a fixed round trip plus a little per vector, roughly what
+Pinecone takes from a nearby region. Compares one batch at a time with
+several batches in flight.
+
+    python -m benchmarks.upsert_throughput
+"""
+import argparse
+import time
+
+from app.storage.vector_storage import upsert_vectors
+
+
+class SimulatedPineconeIndex:
+    """Pinecone index handle sleeping for the latency of each request"""
+
+    def __init__(self, round_trip, per_vector):
+        self.round_trip = round_trip
+        self.per_vector = per_vector
+        self.requests = 0
+
+    def upsert(self, vectors, namespace=None):
+        self.requests += 1
+        time.sleep(self.round_trip + self.per_vector * len(vectors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=2000)
+    parser.add_argument("--round-trip-ms", type=float, default=40)
+    parser.add_argument("--per-vector-ms", type=float, default=0.1)
+    args = parser.parse_args()
+
+    vectors = [
+        {"id": f"vec-{i}", "values": [0.0] * 8, "metadata": {}}
+        for i in range(args.vectors)
+    ]
+    print(f"{'batch size':>10} {'workers':>8} {'requests':>9} {'vectors/s':>10}")
+    for batch_size in (50, 100, 200):
+        for max_workers in (1, 2, 4):
+            index = SimulatedPineconeIndex(
+                args.round_trip_ms / 1000, args.per_vector_ms / 1000
+            )
+            start = time.perf_counter()
+            upsert_vectors(
+                index, vectors, batch_size=batch_size, max_workers=max_workers
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{batch_size:>10} {max_workers:>8} {index.requests:>9} "
+                f"{len(vectors) / elapsed:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
+from multiprocessing import Process
+
 from app.config import Config
 from app.core.indexing import run_index_server
 
 if __name__ == "__main__":
     Config.validate()
-    print("Starting index server...")
-    run_index_server()
+    replicas = Config.INDEX_SERVER_REPLICAS
+    if replicas > 1:
+        # One process per replica, each with its own GIL, on consecutive ports
+        print(f"Starting {replicas} index server replicas...")
+        processes = [
+            Process(target=run_index_server, args=(Config.INDEX_SERVER_PORT + i,))
+            for i in range(replicas)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        print("Starting index server...")
+        run_index_server()
     print("Index server has started.")
@@ -0,0 +1,9 @@
+from aiohttp import web
+
+from app.config import Config
+from app.main import create_stream_app
+
+if __name__ == "__main__":
+    Config.validate()
+    print(f"Starting stream server on port {Config.STREAM_PORT}...")
+    web.run_app(create_stream_app(), host="0.0.0.0", port=Config.STREAM_PORT)
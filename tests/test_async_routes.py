@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import Future
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.api import async_routes
+from app.main import create_stream_app
+
+
+def _connecting_call_async(namespace, method, *args):
+    """call_async of a replica that has to connect first"""
+    time.sleep(0.3)
+    future = Future()
+    future.set_result((method, args))
+    return future
+
+
+def test_call_connects_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(
+        async_routes.index_service, "call_async", _connecting_call_async
+    )
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        result = await async_routes._call("deck", "read_stream", "stream", 0)
+        ticker.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == ("read_stream", ("stream", 0))
+    # The loop kept running while the call was connecting
+    assert ticks > 10
+
+
+class FakeStreams:
+    """Index server holding one finished stream"""
+
+    def __init__(self):
+        self.started = []
+
+    def call_async(self, namespace, method, *args):
+        future = Future()
+        if method == "start_worker":
+            self.started.append(args)
+            future.set_result("stream-2")
+        else:
+            stream_id, offset = args[:2]
+            chunks = ["Hello ", "world"][offset:]
+            future.set_result({"chunks": chunks, "done": True})
+        return future
+
+
+def _get(streams, monkeypatch, headers=None):
+    monkeypatch.setattr(async_routes.index_service, "call_async", streams.call_async)
+
+    async def main():
+        app = create_stream_app()
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get(
+                "/stream", params={"text": "hi", "uuid": "deck"}, headers=headers
+            )
+            return response.status, await response.text()
+
+    return asyncio.run(main())
+
+
+def test_stream_ends_with_an_end_event(monkeypatch):
+    status, body = _get(FakeStreams(), monkeypatch)
+    assert status == 200
+    assert "id: stream-2:2\ndata: world" in body
+    assert body.endswith("id: stream-2:end\nevent: end\ndata: \n\n")
+
+
+def test_resume_after_the_end_event_is_no_content(monkeypatch):
+    streams = FakeStreams()
+    status, body = _get(streams, monkeypatch, {"Last-Event-ID": "stream-1:end"})
+    assert (status, body) == (204, "")
+    assert streams.started == []
+
+
+def test_resume_before_the_end_event_sends_the_rest(monkeypatch):
+    streams = FakeStreams()
+    status, body = _get(streams, monkeypatch, {"Last-Event-ID": "stream-1:1"})
+    assert status == 200
+    assert "Hello" not in body
+    assert "id: stream-1:2\ndata: world" in body
+    assert streams.started == []
@@ -0,0 +1,33 @@
+import pytest
+
+from app.config import Config
+
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    for name in [
+        "MONGO_DB_URL",
+        "PINECONE_API_KEY",
+        "OPENAI_API_KEY",
+        "AWS_ACCESS_KEY_ID",
+        "AWS_SECRET_ACCESS_KEY",
+    ]:
+        monkeypatch.setattr(Config, name, "set")
+    monkeypatch.setattr(Config, "DOCUMENTS_DIR", str(tmp_path / "documents"))
+    monkeypatch.setattr(Config, "PREVIEW_DIR", str(tmp_path / "previews"))
+    monkeypatch.setattr(Config, "PORT", 5601)
+    monkeypatch.setattr(Config, "INDEX_SERVER_PORT", 5602)
+    return monkeypatch
+
+
+def test_default_ports_leave_room_for_replicas(config):
+    config.setattr(Config, "STREAM_PORT", 5700)
+    config.setattr(Config, "INDEX_SERVER_REPLICAS", 8)
+    assert Config.validate()
+
+
+def test_stream_port_among_the_replica_ports_is_rejected(config):
+    config.setattr(Config, "STREAM_PORT", 5603)
+    config.setattr(Config, "INDEX_SERVER_REPLICAS", 2)
+    with pytest.raises(ValueError, match="STREAM_PORT=5603 overlaps"):
+        Config.validate()
@@ -0,0 +1,33 @@
+from collections import Counter
+
+from app.core.hash_ring import HashRing
+
+NODES = ["index-1:5602", "index-2:5602", "index-3:5602"]
+
+
+def test_every_node_in_failover_order():
+    ring = HashRing(NODES)
+    for key in ["doc-a", "doc-b", None]:
+        nodes = ring.get_nodes(key)
+        assert sorted(nodes) == sorted(NODES)
+        assert ring.get_nodes(key) == nodes
+
+
+def test_keys_spread_over_the_nodes():
+    ring = HashRing(NODES)
+    owners = Counter(ring.get_nodes(f"doc-{i}")[0] for i in range(3000))
+    assert set(owners) == set(NODES)
+    assert min(owners.values()) > 600
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(NODES)
+    smaller = HashRing(NODES[:2])
+    for i in range(1000):
+        key = f"doc-{i}"
+        owner = ring.get_nodes(key)[0]
+        if owner != NODES[2]:
+            assert smaller.get_nodes(key)[0] == owner
+        else:
+            # The keys of the removed node go to their next replica
+            assert smaller.get_nodes(key)[0] == ring.get_nodes(key)[1]
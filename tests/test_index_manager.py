@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_index")
+
+from app.core import indexing  # noqa: E402
+from app.core.answer_cache import AnswerCache  # noqa: E402
+from app.core.indexing import IndexManager  # noqa: E402
+
+NAMESPACES = [f"deck-{i}" for i in range(6)]
+
+
+class FakeCatalog:
+    """Stand-in for the Mongo backed document catalog"""
+
+
+class FakeEmbedding:
+    """Stand-in for the OpenAI embedding model"""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def get_query_embedding(self, query_text):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return [float(len(query_text)), 1.0]
+
+
+class FakeResponse:
+    """Query response as produced by Pinecone retrieval and OpenAI generation"""
+
+    def __init__(self, namespace, tokens):
+        self.tokens = tokens
+        self.source_nodes = [
+            SimpleNamespace(
+                node=SimpleNamespace(
+                    node_info={"slide_number": NAMESPACES.index(namespace) + 1}
+                ),
+                score=0.9,
+            )
+        ]
+
+    @property
+    def response_gen(self):
+        for token in self.tokens:
+            # Yield the thread mid-answer so concurrent queries interleave
+            time.sleep(0.001)
+            yield token
+
+    def __str__(self):
+        return "".join(self.tokens)
+
+
+class FakeIndex:
+    """Index of one deck, answering only with that deck's content"""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    def as_query_engine(self, streaming=False, similarity_top_k=None):
+        return SimpleNamespace(
+            query=lambda query_text: FakeResponse(
+                self.namespace, [f"{self.namespace} ", "answers ", query_text]
+            )
+        )
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(indexing, "get_pinecone_client", lambda: object())
+    monkeypatch.setattr(indexing, "get_document_catalog", FakeCatalog)
+    monkeypatch.setattr(indexing, "get_embedding_cache", lambda: None)
+    # The OpenAI models load their tokenizer over the network
+    monkeypatch.setattr(indexing, "OpenAIEmbedding", FakeEmbedding)
+    monkeypatch.setattr(IndexManager, "_build_service_context", lambda self: None)
+    # Every query has to reach its index instead of a cached answer
+    monkeypatch.setattr(indexing.Config, "ANSWER_CACHE_ENABLED", False)
+    monkeypatch.setattr(indexing.Config, "QUERY_WORKER_MAX_WORKERS", 8)
+    monkeypatch.setattr(indexing.Config, "QUERY_WORKER_MAX_QUEUE", 500)
+
+    manager = IndexManager()
+    manager.builds = []
+    builds_lock = threading.Lock()
+
+    def build_index(namespace):
+        with builds_lock:
+            manager.builds.append(namespace)
+        # Slow enough for the first queries of a deck to race on the build
+        time.sleep(0.05)
+        return FakeIndex(namespace)
+
+    monkeypatch.setattr(manager, "_build_index", build_index)
+    return manager
+
+
+def _read_all(manager, stream_id):
+    chunks = []
+    while True:
+        result = manager.read_stream(stream_id, len(chunks), timeout=5)
+        chunks.extend(result["chunks"])
+        if result["done"]:
+            return chunks
+
+
+def test_concurrent_queries_on_different_decks(manager):
+    def query(i):
+        namespace = NAMESPACES[i % len(NAMESPACES)]
+        return namespace, i, manager.query_index(f"question {i}", namespace)
+
+    with ThreadPoolExecutor(32) as executor:
+        results = list(executor.map(query, range(300)))
+
+    for namespace, i, result in results:
+        assert result["text"] == f"{namespace} answers question {i}"
+        assert result["slides"][0]["slideNumber"] == NAMESPACES.index(namespace) + 1
+    # Each deck is built once, however many queries raced for it
+    assert sorted(manager.builds) == sorted(NAMESPACES)
+
+
+def test_concurrent_streams_on_different_decks(manager):
+    def stream(i):
+        namespace = NAMESPACES[i % len(NAMESPACES)]
+        stream_id = manager.start_worker(f"question {i}", namespace)
+        return namespace, i, _read_all(manager, stream_id)
+
+    with ThreadPoolExecutor(32) as executor:
+        results = list(executor.map(stream, range(200)))
+
+    for namespace, i, chunks in results:
+        text = "".join(chunk for chunk in chunks if isinstance(chunk, str))
+        assert text == f"{namespace} answers question {i}"
+        assert chunks[-1] == {
+            "event": "slides",
+            "data": [
+                {
+                    "slideNumber": NAMESPACES.index(namespace) + 1,
+                    "slideIndex": NAMESPACES.index(namespace),
+                    "score": 0.9,
+                }
+            ],
+        }
+    assert sorted(manager.builds) == sorted(NAMESPACES)
+    # Queries waiting on a build miss too, but every lookup is counted once
+    stats = manager.get_index_cache_stats()
+    assert stats["hits"] + stats["misses"] == 200
+
+
+def test_exact_answer_hit_skips_the_query_embedding(manager):
+    manager.answer_cache = AnswerCache(similarity_threshold=0.99)
+    first = manager.query_index("What is on slide 2?", "deck-0")
+    assert manager.embed_model.calls == 1
+
+    assert manager.query_index("what is on slide 2", "deck-0") == first
+    assert manager.embed_model.calls == 1
+    assert manager.answer_cache.stats()["hits"] == 1
+
+
+def test_failed_query_embedding_is_a_cache_miss(manager):
+    manager.answer_cache = AnswerCache(similarity_threshold=0.99)
+    manager.embed_model.error = ConnectionError("OpenAI unreachable")
+
+    result = manager.query_index("question", "deck-0")
+    assert result["text"] == "deck-0 answers question"
+    assert manager.answer_cache.stats()["misses"] == 1
+
+
+def test_summary_replaces_the_excerpt_preview(manager):
+    prompts = []
+
+    def predict(prompt, **prompt_args):
+        prompts.append(prompt.format(**prompt_args))
+        return "A deck about {braces}.", prompts[-1]
+
+    manager.summary_predictor = SimpleNamespace(predict=predict)
+    manager.catalog = SimpleNamespace(updates=[])
+    manager.catalog.update = lambda doc_id, fields: manager.catalog.updates.append(
+        (doc_id, fields)
+    )
+
+    manager._summarize_document("deck-0", "Slide {1} text")
+    assert prompts == ["Summarize this document in 2-3 sentences: Slide {1} text"]
+    assert manager.catalog.updates == [
+        ("deck-0", {"preview": "A deck about {braces}.", "preview_status": "summary"})
+    ]
@@ -0,0 +1,29 @@
+import threading
+
+import pytest
+
+pytest.importorskip("llama_index")
+
+from app.core.index_client import create_index_client, get_auth_key  # noqa: E402
+from app.core.indexing import INDEX_SERVER_METHODS, IndexManager  # noqa: E402
+from app.core.rpc import RPCServer  # noqa: E402
+from tests.test_rpc import _free_port, _wait_listening  # noqa: E402
+
+
+def test_served_methods_exist():
+    for method in INDEX_SERVER_METHODS:
+        assert callable(getattr(IndexManager, method)), method
+
+
+def test_client_round_trip_with_the_shared_auth_key():
+    address = ("127.0.0.1", _free_port())
+    server = RPCServer(address, get_auth_key())
+    server.register("ping", lambda: True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _wait_listening(address)
+
+    client = create_index_client(address, max_retries=1)
+    try:
+        assert client.ping() is True
+    finally:
+        client.close()
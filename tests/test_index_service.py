@@ -0,0 +1,129 @@
+import pytest
+
+from app.core.rpc import RPCConnectionError
+from app.services.index_service import IndexService
+
+ENDPOINTS = ["index-1:5602", "index-2:5602", "index-3:5602"]
+
+
+class FakeClient:
+    """RPCClient stand-in answering with its endpoint name or raising"""
+
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.calls = []
+
+    def call(self, method, args=(), kwargs=None, timeout=None):
+        self.calls.append(method)
+        if self.error is not None:
+            raise self.error
+        return True if method == "ping" else self.name
+
+    def call_async(self, method, *args, **kwargs):
+        self.calls.append(method)
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+@pytest.fixture
+def service():
+    service = IndexService(ENDPOINTS)
+    for name, endpoint in service.endpoints.items():
+        endpoint._client = FakeClient(name)
+    return service
+
+
+def _owners(service, key):
+    return service.ring.get_nodes(key)
+
+
+def test_calls_go_to_the_owner_of_the_namespace(service):
+    owner = _owners(service, "doc-1")[0]
+    assert service.query_index("question", "doc-1") == owner
+    assert service.query_index("another question", "doc-1") == owner
+
+
+def test_fails_over_when_the_owner_is_unreachable(service):
+    owner, next_replica, _ = _owners(service, "doc-1")
+    service.endpoints[owner]._client.error = RPCConnectionError("Connection refused")
+
+    assert service.query_index("question", "doc-1") == next_replica
+    assert not service.endpoints[owner].available
+    # The replica cooling down isn't tried first anymore
+    assert service.query_index("question", "doc-1") == next_replica
+    assert service.endpoints[owner]._client.calls == ["query_index"]
+
+
+def test_recovered_owner_takes_its_namespaces_back(service):
+    owner, next_replica, _ = _owners(service, "doc-1")
+    service.endpoints[owner]._client.error = RPCConnectionError("RPC connection lost")
+    assert service.query_index("question", "doc-1") == next_replica
+
+    service.endpoints[owner]._client.error = None
+    service.endpoints[owner].down_until = 0
+    assert service.query_index("question", "doc-1") == owner
+
+
+def test_slow_call_is_not_failed_over(service):
+    owner = _owners(service, "doc-1")[0]
+    service.endpoints[owner]._client.error = TimeoutError("RPC call timed out")
+
+    with pytest.raises(TimeoutError):
+        service.query_index("question", "doc-1")
+    assert service.endpoints[owner].available
+
+
+@pytest.mark.parametrize(
+    "error",
+    [FileNotFoundError("deck.pptx"), ConnectionRefusedError(), ValueError("bad")],
+)
+def test_remote_errors_are_not_failed_over(service, error):
+    # Raised by the index server handler, e.g. a missing file or an OpenAI or
+    # Pinecone request failing there
+    owner, next_replica, _ = _owners(service, "doc-1")
+    service.endpoints[owner]._client.error = error
+
+    with pytest.raises(type(error)):
+        service.index_document("deck.pptx", "doc-1")
+    assert service.endpoints[owner].available
+    assert service.endpoints[next_replica]._client.calls == []
+
+
+def test_no_reachable_replica(service):
+    for endpoint in service.endpoints.values():
+        endpoint._client.error = RPCConnectionError("Connection refused")
+
+    with pytest.raises(ConnectionError, match="No index server reachable"):
+        service.query_index("question", "doc-1")
+
+
+def test_async_calls_fail_over(service):
+    owner, next_replica, _ = _owners(service, "doc-1")
+    service.endpoints[owner]._client.error = RPCConnectionError("Host is down")
+    assert service.call_async("doc-1", "read_stream", "stream", 0) == next_replica
+
+
+def test_health_reports_every_replica(service):
+    down = ENDPOINTS[1]
+    service.endpoints[down]._client.error = RPCConnectionError("Connection refused")
+    assert service.health_check() == {
+        ENDPOINTS[0]: True,
+        ENDPOINTS[1]: False,
+        ENDPOINTS[2]: True,
+    }
+
+
+def test_cache_stats_per_replica(service):
+    down = ENDPOINTS[2]
+    service.endpoints[down]._client.error = RPCConnectionError("Connection refused")
+    stats = service.get_cache_stats()
+    assert stats[down] is None
+    for name in ENDPOINTS[:2]:
+        assert stats[name] == {"index": name, "answers": name, "embeddings": name}
+        assert service.endpoints[name]._client.calls == [
+            "get_index_cache_stats",
+            "get_answer_cache_stats",
+            "get_embedding_cache_stats",
+        ]
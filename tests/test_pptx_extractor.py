@@ -0,0 +1,20 @@
+from pptx import Presentation
+
+from app.utils.pptx_extractor import iter_slides
+
+
+def test_hidden_slides_keep_the_numbers_of_the_visible_ones(tmp_path):
+    presentation = Presentation()
+    layout = presentation.slide_layouts[5]
+    for title in ["Intro", "Backup", "Results"]:
+        presentation.slides.add_slide(layout).shapes.title.text = title
+    # Hide the second slide, LibreOffice leaves it out of the previews
+    presentation.slides[1]._element.set("show", "0")
+    path = tmp_path / "deck.pptx"
+    presentation.save(path)
+
+    slides = [
+        (slide["title"], slide["slide_number"], slide["slide_index"])
+        for slide in iter_slides(str(path))
+    ]
+    assert slides == [("Intro", 1, 0), ("Results", 3, 1)]
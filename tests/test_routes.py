@@ -0,0 +1,59 @@
+import pytest
+
+from app.api import routes
+from app.main import create_app
+
+
+class FakeIndexService:
+    """Index service holding one finished stream"""
+
+    def __init__(self):
+        self.started = []
+
+    def initialize_index(self, doc_id):
+        pass
+
+    def start_worker(self, query_text, doc_id):
+        self.started.append(query_text)
+        return "stream-2"
+
+    def read_stream(self, doc_id, stream_id, offset=0, timeout=0):
+        return {"chunks": ["Hello ", "world"][offset:], "done": True}
+
+
+@pytest.fixture
+def index_service(monkeypatch):
+    service = FakeIndexService()
+    monkeypatch.setattr(routes, "index_service", service)
+    return service
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+def _get_stream(client, headers=None):
+    return client.get("/stream?text=hi&uuid=deck", headers=headers)
+
+
+def test_stream_ends_with_an_end_event(client, index_service):
+    response = _get_stream(client)
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "id: stream-2:2\ndata: world" in body
+    assert body.endswith("id: stream-2:end\nevent: end\ndata: \n\n")
+
+
+def test_resume_after_the_end_event_is_no_content(client, index_service):
+    response = _get_stream(client, {"Last-Event-ID": "stream-1:end"})
+    assert response.status_code == 204
+    assert index_service.started == []
+
+
+def test_resume_before_the_end_event_sends_the_rest(client, index_service):
+    response = _get_stream(client, {"Last-Event-ID": "stream-1:1"})
+    body = response.get_data(as_text=True)
+    assert "Hello" not in body
+    assert "id: stream-1:2\ndata: world" in body
+    assert index_service.started == []
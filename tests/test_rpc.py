@@ -0,0 +1,160 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+import pytest
+
+from app.core.rpc import RPCClient, RPCConnectionError, RPCError, RPCServer
+
+AUTHKEY = b"test-auth-key"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_listening(address, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(address, timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.01)
+    raise RuntimeError(f"RPC server didn't start on {address}")
+
+
+def _fail():
+    raise ValueError("handler failed")
+
+
+def _missing_file():
+    open("/nonexistent/deck.pptx")
+
+
+@pytest.fixture
+def release():
+    """Event the blocking test handlers wait on"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def address(release):
+    address = ("127.0.0.1", _free_port())
+    server = RPCServer(address, AUTHKEY, max_workers=2)
+    server.register("add", lambda a, b=0: a + b)
+    server.register("fail", _fail)
+    server.register("missing_file", _missing_file)
+    server.register("block", lambda: release.wait(5))
+    server.register(
+        "long_poll", lambda: release.wait(5), executor=ThreadPoolExecutor(4)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _wait_listening(address)
+    return address
+
+
+@pytest.fixture
+def client(address):
+    client = RPCClient(address, AUTHKEY, pool_size=2, timeout=5)
+    yield client
+    client.close()
+
+
+def test_round_trip(client):
+    assert client.call("add", (2, 3)) == 5
+    assert client.call("add", (2,), {"b": 5}) == 7
+    assert client.add(1, b=1) == 2
+    assert client.call_async("add", 4, 4).result(timeout=5) == 8
+
+
+def test_concurrent_calls_share_connections(client):
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda i: client.add(i, i), range(50)))
+    assert results == [i * 2 for i in range(50)]
+
+
+def test_handler_exception_is_raised_by_the_client(client):
+    with pytest.raises(ValueError, match="handler failed"):
+        client.fail()
+
+
+def test_remote_os_errors_are_not_connection_errors(client):
+    with pytest.raises(FileNotFoundError) as excinfo:
+        client.missing_file()
+    assert not isinstance(excinfo.value, RPCConnectionError)
+
+
+def test_unknown_method(client):
+    with pytest.raises(RPCError, match="Unknown method"):
+        client.missing()
+
+
+def test_timeout_leaves_the_connection_usable(client, release):
+    with pytest.raises(TimeoutError):
+        client.call("block", timeout=0.2)
+    release.set()
+    assert client.add(1, 1) == 2
+
+
+def test_own_executor_keeps_long_polls_off_the_shared_pool(client, release):
+    # More long polls than the server's shared workers
+    polls = [client.call_async("long_poll") for _ in range(4)]
+    start = time.time()
+    assert client.call("add", (1, 1), timeout=2) == 2
+    assert time.time() - start < 1
+    release.set()
+    assert [poll.result(timeout=5) for poll in polls] == [True] * 4
+
+
+def test_server_survives_peers_hanging_up_before_the_handshake(address):
+    for _ in range(3):
+        socket.create_connection(address).close()
+    client = RPCClient(address, AUTHKEY, pool_size=1)
+    assert client.add(1) == 1
+    client.close()
+
+
+def test_wrong_auth_key_is_rejected(address):
+    with pytest.raises(AuthenticationError):
+        RPCClient(address, b"wrong-key", pool_size=1)
+
+
+def test_lost_connection_fails_pending_calls():
+    listener = Listener(("127.0.0.1", 0), authkey=AUTHKEY)
+
+    def crash_on_first_request():
+        conn = listener.accept()
+        conn.recv_bytes()
+        conn.close()
+
+    threading.Thread(target=crash_on_first_request, daemon=True).start()
+    client = RPCClient(listener.address, AUTHKEY, pool_size=1)
+    try:
+        with pytest.raises(RPCConnectionError):
+            client.call("add", (1, 1), timeout=5)
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_unreachable_server_raises_connection_error():
+    with pytest.raises(RPCConnectionError):
+        RPCClient(("127.0.0.1", _free_port()), AUTHKEY, pool_size=1)
+
+
+def test_silent_server_times_out_the_handshake():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        start = time.time()
+        with pytest.raises(RPCConnectionError):
+            RPCClient(listener.getsockname(), AUTHKEY, pool_size=1, connect_timeout=0.3)
+        assert time.time() - start < 2
@@ -0,0 +1,40 @@
+import threading
+import time
+
+from app.core.streaming import StreamBuffer, StreamRegistry
+
+
+def test_resume_from_an_offset():
+    buffer = StreamBuffer()
+    for chunk in ["a", "b", "c"]:
+        buffer.put(chunk)
+
+    assert buffer.read() == (["a", "b", "c"], False)
+    # A reconnecting reader only gets what it hasn't seen yet
+    assert buffer.read(2) == (["c"], False)
+    buffer.put(None)
+    assert buffer.read(3) == ([], True)
+
+
+def test_read_waits_for_new_chunks():
+    buffer = StreamBuffer()
+    threading.Timer(0.1, buffer.put, ("late",)).start()
+    start = time.time()
+    assert buffer.read(0, timeout=5) == (["late"], False)
+    assert time.time() - start < 2
+
+
+def test_read_times_out_empty_handed():
+    buffer = StreamBuffer()
+    assert buffer.read(0, timeout=0.05) == ([], False)
+
+
+def test_registry_expires_idle_streams():
+    registry = StreamRegistry(ttl=60)
+    stream_id, buffer = registry.create()
+    buffer.put("chunk")
+    assert registry.get(stream_id) is buffer
+
+    buffer.updated_at -= 61
+    assert registry.get(stream_id) is None
+    assert registry.get("unknown") is None
@@ -0,0 +1,123 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.utils.unoserver_client import UnoserverClient
+
+
+class FakeUnoserverHandler(BaseHTTPRequestHandler):
+    """unoserver REST API answering with the uploaded body reversed"""
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server.requests.append((self.path, self.headers["Content-Type"], body))
+        if server.delay:
+            time.sleep(server.delay)
+        if server.status != 200:
+            self.send_response(server.status)
+            self.end_headers()
+            self.wfile.write(b"conversion failed")
+            return
+
+        converted = body[::-1]
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(converted) + server.truncate))
+        self.end_headers()
+        # Send the result in pieces, as LibreOffice's output is streamed back
+        for start in range(0, len(converted), 1024):
+            self.wfile.write(converted[start : start + 1024])
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUnoserverHandler)
+    server.requests = []
+    server.status = 200
+    server.delay = 0
+    # Bytes promised but never sent, to cut a download short
+    server.truncate = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    host, port = server.server_address
+    client = UnoserverClient(f"http://{host}:{port}", timeout=5, chunk_size=4096)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def deck(tmp_path):
+    path = tmp_path / "deck.pptx"
+    path.write_bytes(bytes(range(256)) * 400)
+    return path
+
+
+def test_convert_streams_the_deck_and_the_result(client, server, deck, tmp_path):
+    output = tmp_path / "deck.pdf"
+    assert client.convert(str(deck), str(output)) == str(output)
+
+    path, content_type, body = server.requests[0]
+    assert path == "/request"
+    boundary = content_type.split("boundary=")[1]
+    assert b'name="convert-to"\r\n\r\npdf\r\n' in body
+    assert b'filename="deck.pptx"' in body
+    assert body.endswith(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    # The whole deck went out, and the converted bytes reached the disk
+    assert deck.read_bytes() in body
+    assert output.read_bytes() == body[::-1]
+    assert not (tmp_path / "deck.pdf.part").exists()
+
+
+def test_connection_is_reused(client, server, deck, tmp_path):
+    for i in range(3):
+        client.convert(str(deck), str(tmp_path / f"deck-{i}.pdf"))
+    assert len(server.requests) == 3
+    pool = client.session.get_adapter(client.base_url).poolmanager
+    assert len(pool.pools) == 1
+
+
+def test_error_status_raises_and_writes_nothing(client, server, deck, tmp_path):
+    server.status = 500
+    output = tmp_path / "deck.pdf"
+    with pytest.raises(ValueError, match="status 500"):
+        client.convert(str(deck), str(output))
+    assert list(tmp_path.iterdir()) == [deck]
+
+
+def test_interrupted_download_leaves_no_partial_file(client, server, deck, tmp_path):
+    server.truncate = 100
+    with pytest.raises(requests.RequestException):
+        client.convert(str(deck), str(tmp_path / "deck.pdf"))
+    assert list(tmp_path.iterdir()) == [deck]
+
+
+def test_slow_conversion_times_out(server, deck, tmp_path):
+    server.delay = 1
+    host, port = server.server_address
+    client = UnoserverClient(f"http://{host}:{port}", timeout=0.2, timeout_per_mb=0)
+    try:
+        with pytest.raises(requests.Timeout):
+            client.convert(str(deck), str(tmp_path / "deck.pdf"))
+    finally:
+        client.close()
+    assert list(tmp_path.iterdir()) == [deck]
+
+
+def test_timeout_grows_with_the_deck_size():
+    client = UnoserverClient("http://unoserver:2004", timeout=60, timeout_per_mb=10)
+    assert client.timeout_for(0) == (5, 60)
+    assert client.timeout_for(5 * 1024 * 1024) == (5, 110)
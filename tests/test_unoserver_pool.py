@@ -0,0 +1,175 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from app.utils.unoserver_client import RedisUnoserverPool
+
+URLS = ["http://unoserver-1:2004", "http://unoserver-2:2004"]
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the pool uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        with self.lock:
+            if nx and self._live(key) is not None:
+                return None
+            self.values[key] = str(value).encode("utf-8")
+            self.expires.pop(key, None)
+            if ex is not None:
+                self.expires[key] = time.time() + ex
+            return True
+
+    def get(self, key):
+        with self.lock:
+            return self._live(key)
+
+    def mget(self, keys):
+        with self.lock:
+            return [self._live(key) for key in keys]
+
+    def delete(self, key):
+        with self.lock:
+            self.values.pop(key, None)
+
+    def hincrby(self, key, field, amount):
+        with self.lock:
+            counts = self.values.setdefault(key, {})
+            field = field.encode("utf-8")
+            counts[field] = counts.get(field, 0) + amount
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self.values.get(key, {}))
+
+    def zadd(self, key, mapping):
+        with self.lock:
+            self.values.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        with self.lock:
+            self.values.get(key, {}).pop(member, None)
+
+    def zremrangebyscore(self, key, low, high):
+        with self.lock:
+            members = self.values.get(key, {})
+            for member, score in list(members.items()):
+                if score <= high:
+                    del members[member]
+
+    def zcard(self, key):
+        with self.lock:
+            return len(self.values.get(key, {}))
+
+
+class FakeClient:
+    """UnoserverClient stand-in converting until released"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.release = threading.Event()
+        self.error = None
+
+    def convert(self, input_path, output_path, convert_to="pdf"):
+        if self.error is not None:
+            raise self.error
+        self.release.wait(5)
+        return output_path
+
+    def health_check(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+def _worker_pool(redis, **kwargs):
+    """Pool of one web worker, with clients of its own like under gunicorn"""
+    return RedisUnoserverPool(
+        [FakeClient(url) for url in URLS],
+        get_redis=lambda: redis,
+        poll_interval=0.01,
+        **kwargs,
+    )
+
+
+def _release_all(*pools):
+    for pool in pools:
+        for backend in pool.backends:
+            backend.client.release.set()
+
+
+def test_concurrency_limit_holds_over_all_workers(redis):
+    first, second = _worker_pool(redis), _worker_pool(redis, queue_timeout=0.2)
+    threads = [
+        threading.Thread(target=pool.convert, args=("deck.pptx", "deck.pdf"))
+        for pool in (first, second)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while first.stats()["backends"][URLS[1]]["outstanding"] < 1:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        # Both workers see both backends busy, one conversion each
+        for pool in (first, second):
+            backends = pool.stats()["backends"]
+            assert [backends[url]["outstanding"] for url in URLS] == [1, 1]
+        with pytest.raises(TimeoutError):
+            second.convert("deck.pptx", "deck.pdf")
+    finally:
+        _release_all(first, second)
+        for thread in threads:
+            thread.join(5)
+
+    stats = second.stats()
+    assert stats["queued"] == 0
+    assert [stats["backends"][url]["conversions"] for url in URLS] == [1, 1]
+    assert [stats["backends"][url]["outstanding"] for url in URLS] == [0, 0]
+
+
+def test_unreachable_backend_is_skipped_by_every_worker(redis):
+    first, second = _worker_pool(redis), _worker_pool(redis)
+    first.backends[0].client.error = requests.ConnectionError("refused")
+    with pytest.raises(requests.ConnectionError):
+        first.convert("deck.pptx", "deck.pdf")
+
+    assert second.backend_health() == {URLS[0]: False, URLS[1]: True}
+    _release_all(second)
+    second.convert("deck.pptx", "deck.pdf")
+    backends = second.stats()["backends"]
+    assert backends[URLS[0]]["failures"] == 1
+    assert backends[URLS[1]]["conversions"] == 1
+
+
+def test_slots_of_a_crashed_worker_expire(redis):
+    crashed = _worker_pool(redis, slot_ttl=0.1)
+    # Take every slot and never release them
+    for _ in URLS:
+        crashed._acquire()
+
+    pool = _worker_pool(redis, queue_timeout=2)
+    _release_all(pool)
+    start = time.time()
+    assert pool.convert("deck.pptx", "deck.pdf") == "deck.pdf"
+    assert time.time() - start < 1
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("llama_index")
+
+from llama_index.data_structs.node import Node  # noqa: E402
+from llama_index.vector_stores.types import NodeWithEmbedding  # noqa: E402
+
+from app.storage import vector_storage  # noqa: E402
+from app.storage.vector_storage import (  # noqa: E402
+    BatchedPineconeVectorStore,
+    upsert_vectors,
+)
+from app.utils import retry  # noqa: E402
+
+
+class FakePineconeIndex:
+    """Pinecone index handle recording upserted batches and their overlap"""
+
+    def __init__(self, latency=0.02, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=None):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("Pinecone unavailable")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Pinecone's round trip, during which other batches can be sent
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            self.batches.append((namespace, [vector["id"] for vector in vectors]))
+
+
+def _vectors(count):
+    return [
+        {"id": f"vec-{i}", "values": [float(i), 1.0], "metadata": {}}
+        for i in range(count)
+    ]
+
+
+def test_vectors_are_split_into_batches():
+    index = FakePineconeIndex(latency=0)
+    assert upsert_vectors(index, _vectors(250), "deck", batch_size=100) == 250
+
+    sizes = sorted(len(ids) for _, ids in index.batches)
+    assert sizes == [50, 100, 100]
+    upserted = sorted(vector_id for _, ids in index.batches for vector_id in ids)
+    assert upserted == sorted(f"vec-{i}" for i in range(250))
+    assert {namespace for namespace, _ in index.batches} == {"deck"}
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 4])
+def test_batches_in_flight_are_bounded(max_workers):
+    index = FakePineconeIndex()
+    upsert_vectors(index, _vectors(100), batch_size=10, max_workers=max_workers)
+    assert len(index.batches) == 10
+    assert index.max_in_flight == max_workers
+
+
+def test_failed_batch_is_retried_alone(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda seconds: None)
+    index = FakePineconeIndex(latency=0, failures=2)
+
+    assert upsert_vectors(index, _vectors(30), batch_size=10, max_workers=1) == 30
+    # Two failed attempts of the first batch, then each batch exactly once
+    assert [ids[0] for _, ids in index.batches] == ["vec-0", "vec-10", "vec-20"]
+
+
+def test_batch_failing_every_retry_fails_the_upsert(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda seconds: None)
+    index = FakePineconeIndex(latency=0, failures=10)
+    with pytest.raises(ConnectionError):
+        upsert_vectors(index, _vectors(10), batch_size=10)
+
+
+def test_vector_store_adds_through_batched_upserts(monkeypatch):
+    monkeypatch.setattr(vector_storage.Config, "PINECONE_UPSERT_BATCH_SIZE", 2)
+    index = FakePineconeIndex(latency=0)
+    store = BatchedPineconeVectorStore(
+        pinecone_index=index, namespace="deck", tokenizer=lambda text: text
+    )
+    results = [
+        NodeWithEmbedding(
+            node=Node(text=f"slide {i}", doc_id=f"node-{i}"), embedding=[1.0, 0.0]
+        )
+        for i in range(5)
+    ]
+
+    assert store.add(results) == [f"node-{i}" for i in range(5)]
+    assert sorted(len(ids) for _, ids in index.batches) == [1, 2, 2]
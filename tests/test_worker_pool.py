@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from app.core.worker_pool import QueryWorkerPool, WorkerPoolFullError
+
+
+def test_runs_work_with_a_deadline():
+    pool = QueryWorkerPool(max_workers=1, max_queue=0, timeout=60)
+    future = pool.submit(lambda value, deadline: (value, deadline), "query")
+    value, deadline = future.result(timeout=5)
+    assert value == "query"
+    assert deadline > 0
+    assert pool.stats()["completed"] == 1
+
+
+def test_rejects_work_when_workers_and_queue_are_full():
+    pool = QueryWorkerPool(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block(deadline):
+        started.set()
+        release.wait(5)
+
+    running = pool.submit(block)
+    started.wait(5)
+    queued = pool.submit(block)
+    with pytest.raises(WorkerPoolFullError):
+        pool.submit(block)
+
+    stats = pool.stats()
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (1, 1, 1)
+
+    release.set()
+    running.result(timeout=5)
+    queued.result(timeout=5)
+    # Finished work frees its slot
+    pool.submit(block).result(timeout=5)
+    assert pool.stats()["completed"] == 3